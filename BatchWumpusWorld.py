@@ -0,0 +1,315 @@
+#
+# BatchWumpusWorld.py a vectorized wumpus world, running many worlds in lockstep
+#
+# https://github.com/erikphillips/wumpus_world
+#
+# The state of the worlds is kept in arrays indexed by world, which each step updates in place.
+#
+
+
+from Action import *
+from Orientation import *
+import numpy as np
+import Wumpsim
+
+
+# The columns of the percept matrix
+PERCEPT_STENCH = 0
+PERCEPT_BREEZE = 1
+PERCEPT_GLITTER = 2
+PERCEPT_BUMP = 3
+PERCEPT_SCREAM = 4
+
+# The change in x and y for a step forward, indexed by orientation. The locations are kept as np.intp, the type
+# NumPy indexes with, so looking up the squares of the agents needs no conversion
+_FORWARD_X = np.zeros(4, dtype=np.intp)
+_FORWARD_Y = np.zeros(4, dtype=np.intp)
+_FORWARD_X[RIGHT] = 1
+_FORWARD_X[LEFT] = -1
+_FORWARD_Y[UP] = 1
+_FORWARD_Y[DOWN] = -1
+
+
+class BatchWumpusWorld(object):
+    """ BatchWumpusWorld: holds many wumpus worlds as arrays, executing one action per world at a time
+
+        The grids are indexed [world, x, y], sized for the largest world and padded by one square on every side, so
+        the locations (1..size) index the grids directly and the squares next to the walls need no bounds checks.
+        The walls of each world are at its own size, kept in world_sizes. """
+
+    def __init__(self, worlds, world_size=None):
+        """ __init__: create a batch from a list of wumpus worlds or generated worlds, copying the layout of each,
+                      whose sizes are taken from the worlds unless a world_size is given for all of them """
+        if world_size is not None:
+            sizes = [world_size] * len(worlds)
+        else:
+            sizes = [getattr(world, "world_size", Wumpsim.WORLD_SIZE) for world in worlds]
+
+        self.world_sizes = np.array(sizes, dtype=np.intp)
+        self.world_size = max(sizes, default=world_size or Wumpsim.WORLD_SIZE)  # the size of the grids
+        self.num_worlds = len(worlds)
+
+        count = self.num_worlds
+        world_size = self.world_size
+        self.wumpus_x = np.empty(count, dtype=np.intp)
+        self.wumpus_y = np.empty(count, dtype=np.intp)
+        self.gold_x = np.empty(count, dtype=np.intp)
+        self.gold_y = np.empty(count, dtype=np.intp)
+        self.pits = np.zeros((count, world_size + 2, world_size + 2), dtype=bool)
+
+        for index, world in enumerate(worlds):
+            # A wumpus world keeps its layout in its state, a generated world is the layout
+            layout = getattr(world, "current_state", world)
+            if not Wumpsim.has_one_wumpus_and_gold(layout):
+                raise ValueError("a batch only holds worlds with one wumpus and one gold")
+            self.wumpus_x[index] = layout.wumpus_location.x
+            self.wumpus_y[index] = layout.wumpus_location.y
+            self.gold_x[index] = layout.gold_location.x
+            self.gold_y[index] = layout.gold_location.y
+
+            if hasattr(layout, "pit_bitmap"):
+                size = sizes[index]
+                self.pits[index, 1:size + 1, 1:size + 1] = layout.pit_bitmap
+            else:
+                for pit in layout.pit_locations:
+                    self.pits[index, pit.x, pit.y] = True
+
+        self._build_breeze()
+
+        self.agent_x = np.empty(count, dtype=np.intp)
+        self.agent_y = np.empty(count, dtype=np.intp)
+        self.agent_orientation = np.empty(count, dtype=np.intp)
+        self.agent_alive = np.empty(count, dtype=bool)
+        self.agent_has_arrow = np.empty(count, dtype=bool)
+        self.agent_has_gold = np.empty(count, dtype=bool)
+        self.agent_in_cave = np.empty(count, dtype=bool)
+        self.wumpus_alive = np.empty(count, dtype=bool)
+        self.num_actions = np.empty(count, dtype=np.int64)
+        self.percepts = np.empty((count, 5), dtype=bool)
+        self._columns = [self.percepts[:, column] for column in range(5)]
+
+        # The scratch arrays of a step, so a step updates the arrays above in place and allocates nothing
+        self._all = np.ones(count, dtype=bool)
+        self._active = np.empty(count, dtype=bool)
+        self._chosen = np.empty(count, dtype=bool)  # the active worlds given the action being executed
+        self._found = np.empty(count, dtype=bool)
+        self._deadly = np.empty(count, dtype=bool)
+        self._other = np.empty(count, dtype=bool)
+        self._next_x = np.empty(count, dtype=np.intp)
+        self._next_y = np.empty(count, dtype=np.intp)
+        self._distance = np.empty(count, dtype=np.intp)
+        self._cells = np.empty(count, dtype=np.intp)  # the agent's square in the flattened grids
+        self._grid_offsets = np.arange(count, dtype=np.intp) * (world_size + 2) * (world_size + 2)
+        self._pit_cells = self.pits.reshape(-1)
+        self._breeze_cells = self.breeze.reshape(-1)
+
+        self.initialize()
+
+    @classmethod
+    def random(cls, count):
+        """ random: create a batch of count randomly generated worlds """
+        return cls([Wumpsim.WumpusWorld() for _ in range(count)])
+
+    @classmethod
+    def generate(cls, count, world_size=None, seed=None):
+        """ generate: create a batch of count worlds with the bulk NumPy world generator """
+        import WorldGenerator
+        return cls(WorldGenerator.generate_worlds(count, world_size=world_size, seed=seed))
+
+    def _build_breeze(self):
+        """ _build_breeze: mark every square next to a pit as breezy """
+        pits = self.pits
+        self.breeze = np.zeros_like(pits)
+        self.breeze[:, 1:-1, 1:-1] = pits[:, :-2, 1:-1] | pits[:, 2:, 1:-1] | pits[:, 1:-1, :-2] | pits[:, 1:-1, 2:]
+
+    def initialize(self, mask=None):
+        """ initialize: called at the start of a new try, resets every world (or only the masked worlds) to default """
+        if mask is None:
+            mask = self._all
+
+        np.copyto(self.agent_x, 1, where=mask)
+        np.copyto(self.agent_y, 1, where=mask)
+        np.copyto(self.agent_orientation, RIGHT, where=mask)
+        np.copyto(self.agent_alive, True, where=mask)
+        np.copyto(self.agent_has_arrow, True, where=mask)
+        np.copyto(self.agent_has_gold, False, where=mask)
+        np.copyto(self.agent_in_cave, True, where=mask)
+        np.copyto(self.wumpus_alive, True, where=mask)
+        np.copyto(self.num_actions, 0, where=mask)
+
+        for column in self._columns:
+            np.copyto(column, False, where=mask)
+        self._update_location_percepts(mask)
+
+    def _agent_at(self, x, y, out):
+        """ _agent_at: set out to True for every world where the agent is at (x, y), returning out """
+        np.equal(self.agent_x, x, out=out)
+        np.equal(self.agent_y, y, out=self._other)
+        out &= self._other
+        return out
+
+    def _agent_square(self, cells, out):
+        """ _agent_square: set out to the agent's square of a flattened grid in every world, returning out """
+        np.multiply(self.agent_x, self.world_size + 2, out=self._cells)
+        self._cells += self.agent_y
+        self._cells += self._grid_offsets
+        return np.take(cells, self._cells, out=out, mode="clip")  # the squares are in the grid, and clip is unbuffered
+
+    def _update_location_percepts(self, mask):
+        """ _update_location_percepts: update the stench, breeze and glitter percepts of the masked worlds """
+        found = self._found
+
+        np.subtract(self.agent_x, self.wumpus_x, out=self._distance)
+        np.abs(self._distance, out=self._distance)
+        np.subtract(self.agent_y, self.wumpus_y, out=self._next_y)
+        np.abs(self._next_y, out=self._next_y)
+        self._distance += self._next_y
+        np.less_equal(self._distance, 1, out=found)
+        np.copyto(self._columns[PERCEPT_STENCH], found, where=mask)
+
+        np.copyto(self._columns[PERCEPT_BREEZE], self._agent_square(self._breeze_cells, found), where=mask)
+
+        self._agent_at(self.gold_x, self.gold_y, found)
+        np.logical_not(self.agent_has_gold, out=self._other)
+        found &= self._other
+        np.copyto(self._columns[PERCEPT_GLITTER], found, where=mask)
+
+    def get_percepts(self):
+        """ get_percepts: return the (num_worlds, 5) percept matrix for the agent's location in every world """
+        return self.percepts
+
+    def game_over(self, out=None):
+        """ game_over: return an array that is True for every world where the game is over, written into out if
+                       it is given """
+        out = np.logical_and(self.agent_in_cave, self.agent_alive, out=out)
+        return np.logical_not(out, out=out)
+
+    def _choose(self, actions, action):
+        """ _choose: return an array that is True for every active world given the action """
+        np.equal(actions, action, out=self._chosen)
+        self._chosen &= self._active
+        return self._chosen
+
+    def _wumpus_in_line(self, out):
+        """ _wumpus_in_line: set out to True for every world where the wumpus is anywhere in front of the agent """
+        out.fill(False)
+        facing, part = self._deadly, self._other
+        for orientation, agent_a, wumpus_a, agent_b, wumpus_b, ahead in (
+                (RIGHT, self.agent_y, self.wumpus_y, self.agent_x, self.wumpus_x, np.less),
+                (UP, self.agent_x, self.wumpus_x, self.agent_y, self.wumpus_y, np.less),
+                (LEFT, self.agent_y, self.wumpus_y, self.agent_x, self.wumpus_x, np.greater),
+                (DOWN, self.agent_x, self.wumpus_x, self.agent_y, self.wumpus_y, np.greater)):
+            np.equal(self.agent_orientation, orientation, out=facing)
+            facing &= np.equal(agent_a, wumpus_a, out=part)
+            facing &= ahead(agent_b, wumpus_b, out=part)
+            out |= facing
+        return out
+
+    def execute_actions(self, actions):
+        """ execute_actions: execute one action in every world, returning the updated percept matrix
+
+            Actions given to worlds where the game is already over are ignored. The arrays are updated in place, with
+            the scratch arrays made by __init__, so a step allocates nothing. """
+        actions = np.asarray(actions)
+        active = self._active
+        np.logical_and(self.agent_in_cave, self.agent_alive, out=active)
+
+        np.add(self.num_actions, 1, out=self.num_actions, where=active)
+        np.copyto(self._columns[PERCEPT_BUMP], False, where=active)
+        np.copyto(self._columns[PERCEPT_SCREAM], False, where=active)
+
+        # GOFORWARD: move, or bump into the wall, then sense the new location
+        forward = self._choose(actions, GOFORWARD)
+        if forward.any():
+            next_x, next_y, inside = self._next_x, self._next_y, self._found
+            np.take(_FORWARD_X, self.agent_orientation, out=next_x, mode="clip")
+            next_x += self.agent_x
+            np.take(_FORWARD_Y, self.agent_orientation, out=next_y, mode="clip")
+            next_y += self.agent_y
+            np.greater_equal(next_x, 1, out=inside)
+            inside &= np.less_equal(next_x, self.world_sizes, out=self._other)
+            inside &= np.greater_equal(next_y, 1, out=self._other)
+            inside &= np.less_equal(next_y, self.world_sizes, out=self._other)
+
+            bump = np.logical_not(inside, out=self._other)
+            bump &= forward
+            np.copyto(self._columns[PERCEPT_BUMP], True, where=bump)
+            inside &= forward
+            np.copyto(self.agent_x, next_x, where=inside)
+            np.copyto(self.agent_y, next_y, where=inside)
+            self._update_location_percepts(forward)
+
+            deadly = self._agent_square(self._pit_cells, self._deadly)
+            at_wumpus = self._agent_at(self.wumpus_x, self.wumpus_y, self._found)
+            at_wumpus &= self.wumpus_alive
+            deadly |= at_wumpus
+            deadly &= forward
+            self.agent_alive &= np.logical_not(deadly, out=deadly)
+
+        # TURNLEFT and TURNRIGHT: the orientations go counter-clockwise from RIGHT
+        for action, turn in ((TURNLEFT, 1), (TURNRIGHT, 3)):
+            chosen = self._choose(actions, action)
+            np.add(self.agent_orientation, turn, out=self._distance)
+            np.remainder(self._distance, 4, out=self._distance)
+            np.copyto(self.agent_orientation, self._distance, where=chosen)
+
+        # GRAB: pick up the gold if the agent is on it
+        grab = self._choose(actions, GRAB)
+        if grab.any():
+            grab &= self._agent_at(self.gold_x, self.gold_y, self._found)
+            grab &= np.logical_not(self.agent_has_gold, out=self._other)
+            self.agent_has_gold |= grab
+            np.copyto(self._columns[PERCEPT_GLITTER], False, where=grab)
+
+        # SHOOT: the arrow kills the wumpus if it is anywhere in front of the agent
+        shoot = self._choose(actions, SHOOT)
+        shoot &= self.agent_has_arrow
+        if shoot.any():
+            self.agent_has_arrow &= np.logical_not(shoot, out=self._other)
+            hit = shoot
+            hit &= self.wumpus_alive
+            hit &= self._wumpus_in_line(self._found)
+            self.wumpus_alive &= np.logical_not(hit, out=self._other)
+            np.copyto(self._columns[PERCEPT_SCREAM], True, where=hit)
+
+        # CLIMB: leave the cave from the (1,1) square
+        climb = self._choose(actions, CLIMB)
+        if climb.any():
+            climb &= self._agent_at(1, 1, self._found)
+            self.agent_in_cave &= np.logical_not(climb, out=self._other)
+            for column in (PERCEPT_STENCH, PERCEPT_BREEZE, PERCEPT_GLITTER):
+                np.copyto(self._columns[column], False, where=climb)
+
+        return self.percepts
+
+    def get_scores(self, out=None):
+        """ get_scores: return the score of every world, scored the same as WumpusWorld.get_score, written into out
+                        if it is given """
+        if out is None:
+            out = np.empty(self.num_worlds, dtype=np.int64)
+
+        np.negative(self.num_actions, out=out)
+        out -= 9
+        np.add(out, 9, out=out, where=self.agent_has_arrow)
+        gold_out = np.logical_not(self.agent_in_cave, out=self._other)
+        gold_out &= self.agent_has_gold
+        np.add(out, 1000, out=out, where=gold_out)
+        out -= 1000
+        np.add(out, 1000, out=out, where=self.agent_alive)
+        return out
+
+    def run(self, policy, max_moves=Wumpsim.MAX_MOVES_PER_GAME):
+        """ run: play a single try in every world, returning the final scores
+
+            The policy is called with the percept matrix and the game over array, and returns an action per world. """
+        self.initialize()
+
+        num_moves = 0
+        game_over = self.game_over()
+        while not game_over.all() and num_moves < max_moves:
+            actions = policy(self.percepts, game_over)
+            self.execute_actions(actions)
+            self.game_over(out=game_over)
+            num_moves += 1
+
+        return self.get_scores()
@@ -0,0 +1,271 @@
+#
+# Bench.py benchmarks for the wumpus simulator
+#
+# https://github.com/erikphillips/wumpus_world
+#
+# Usage:
+#   python Bench.py [-output FILE] [-compare BASELINE] [-threshold FRACTION] [-repeat N] [-import-target MS]
+#
+
+
+from Action import *
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import Wumpsim
+
+
+# The version of the benchmark results, bumped when the cases change so old baselines are not compared
+BENCH_VERSION = 2
+
+# The slowdown (as a fraction of the baseline time per step) that is reported as a regression
+DEFAULT_THRESHOLD = 0.10
+
+# The world sizes used by the world generation and world file cases
+GENERATION_SIZES = [4, 16, 64, 256]
+FILE_SIZE = 256
+
+ACTIONS = [GOFORWARD, TURNLEFT, TURNRIGHT, GRAB, SHOOT, CLIMB]
+
+# The most that importing the simulator may add to the start of a new interpreter, in milliseconds
+DEFAULT_IMPORT_TARGET_MS = 25.0
+
+
+def _quiet_args(**kwargs):
+    """ _quiet_args: return the simulator arguments for a quiet run of main() """
+    args = Wumpsim.parse_args(["-quiet", "-seed", "1"])
+    for name, value in kwargs.items():
+        setattr(args, name, value)
+    return args
+
+
+def bench_execute_action(action, steps=100000):
+    """ bench_execute_action: execute the same action over and over, starting a new try when the game is over """
+    random.seed(1)
+    wumpus_world = Wumpsim.WumpusWorld(world_size=4)
+    wumpus_world.initialize()
+
+    def run():
+        for _ in range(steps):
+            if wumpus_world.game_over():
+                wumpus_world.initialize()
+            wumpus_world.execute_action(action)
+        return steps
+
+    return run
+
+
+def bench_generate_world(size, worlds):
+    """ bench_generate_world: generate random world states of the given size """
+    def run():
+        random.seed(1)
+        for _ in range(worlds):
+            Wumpsim.State(file_information=None, world_size=size)
+        return worlds
+
+    return run
+
+
+def bench_load_world_file(filename, loads):
+    """ bench_load_world_file: parse the world file the given number of times """
+    def run():
+        for _ in range(loads):
+            Wumpsim.WumpusWorldFileInformation(filename)
+        return loads
+
+    return run
+
+
+def bench_main(trials):
+    """ bench_main: run full episodes through main() with the stock agent, counting each trial as a step """
+    def run():
+        Wumpsim.main(_quiet_args(trials=trials))
+        return trials
+
+    return run
+
+
+def bench_startup(code, runs, cache_directory):
+    """ bench_startup: start a new interpreter that runs the code, over and over, counting each start as a step
+
+        The bytecode is cached in the cache directory as it would be for an installed simulator, so only the first
+        start compiles the modules. """
+    environment = dict(os.environ)
+    environment.pop("PYTHONDONTWRITEBYTECODE", None)
+    environment["PYTHONPYCACHEPREFIX"] = cache_directory
+    directory = os.path.dirname(os.path.abspath(Wumpsim.__file__))
+
+    def run():
+        for _ in range(runs):
+            subprocess.run([sys.executable, "-c", code], cwd=directory, env=environment, check=True)
+        return runs
+
+    return run
+
+
+def write_world_file(filename, size):
+    """ write_world_file: write a world file of the given size with pits at the usual probability """
+    rng = random.Random(size)
+    with open(filename, "w") as outfile:
+        outfile.write("size {}\n".format(size))
+        outfile.write("wumpus {} {}\n".format(size, size))
+        outfile.write("gold {} {}\n".format(size, 1))
+        for x in range(1, size + 1):
+            for y in range(1, size + 1):
+                if (x, y) not in ((1, 1), (size, size), (size, 1)) and rng.random() < Wumpsim.PIT_PROBABILITY:
+                    outfile.write("pit {} {}\n".format(x, y))
+
+
+def get_cases(world_filename, cache_directory):
+    """ get_cases: return the list of (name, run, in_process) benchmark cases, where run() returns the number of
+                   steps, and in_process is False for a case whose work is done by other processes """
+    cases = [("startup.python", bench_startup("pass", 10, cache_directory), False),
+             ("startup.import_wumpsim", bench_startup("import Wumpsim", 10, cache_directory), False)]
+    for action in ACTIONS:
+        cases.append(("execute_action.{}".format(Wumpsim.action_to_string(action)), bench_execute_action(action),
+                      True))
+    for size in GENERATION_SIZES:
+        cases.append(("generate_world.{}".format(size), bench_generate_world(size, max(1, 20000 // (size * size))),
+                      True))
+    cases.append(("load_world_file.{}".format(FILE_SIZE), bench_load_world_file(world_filename, 5), True))
+    cases.append(("main.stock_agent", bench_main(2000), True))
+    return cases
+
+
+def run_case(run, repeat, in_process=True):
+    """ run_case: time the case, keeping the best of the repeats, then measure its peak memory in one more run
+
+        The peak memory is None for a case that isn't run in this process, as only this process's is measured. """
+    best = None
+    steps = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        steps = run()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    peak = None
+    if in_process:
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "steps": steps,
+        "seconds": best,
+        "steps_per_sec": steps / best if best > 0 else float("inf"),
+        "us_per_step": best * 1e6 / steps,
+        "peak_memory_bytes": peak,
+    }
+
+
+def run_benchmarks(repeat=3, stream=sys.stdout):
+    """ run_benchmarks: run every case, returning the results as a JSON-ready dict """
+    results = {
+        "version": BENCH_VERSION,
+        "python": sys.version.split()[0],
+        "simulator": Wumpsim.WUMPSIM_VERSION,
+        "cases": {},
+    }
+
+    handle, world_filename = tempfile.mkstemp(suffix=".txt")
+    os.close(handle)
+    cache_directory = tempfile.mkdtemp()
+    try:
+        write_world_file(world_filename, FILE_SIZE)
+
+        for name, run, in_process in get_cases(world_filename, cache_directory):
+            result = run_case(run, repeat, in_process)
+            results["cases"][name] = result
+            if stream is not None:
+                peak = result["peak_memory_bytes"]
+                print("{:<32} {:>14.1f} steps/sec {:>12.3f} us/step {:>18} peak".format(
+                    name, result["steps_per_sec"], result["us_per_step"],
+                    "{} bytes".format(peak) if peak is not None else "n/a"), file=stream)
+    finally:
+        os.remove(world_filename)
+        shutil.rmtree(cache_directory, ignore_errors=True)
+
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """ compare: return the list of (name, baseline us/step, current us/step) cases that are slower than allowed """
+    regressions = []
+    for name, result in results["cases"].items():
+        if name not in baseline.get("cases", {}):
+            continue
+        before = baseline["cases"][name]["us_per_step"]
+        after = result["us_per_step"]
+        if after > before * (1.0 + threshold):
+            regressions.append((name, before, after))
+    return regressions
+
+
+def import_overhead_ms(results):
+    """ import_overhead_ms: return how much importing the simulator adds to the start of a new interpreter """
+    cases = results["cases"]
+    return (cases["startup.import_wumpsim"]["us_per_step"] - cases["startup.python"]["us_per_step"]) / 1000.0
+
+
+def main(args):
+    """ main: run the benchmarks, save them, and compare them to the baseline, returning the exit status """
+    results = run_benchmarks(repeat=args.repeat)
+
+    if args.output is not None:
+        with open(args.output, "w") as outfile:
+            json.dump(results, outfile, indent=2, sort_keys=True)
+
+    # A slow import fails the run, but the comparison is still made so no other regression is hidden
+    status = 0
+    overhead = import_overhead_ms(results)
+    print("Importing Wumpsim adds {:.1f} ms to a cold start (target {:.1f} ms).".format(overhead, args.import_target))
+    if overhead > args.import_target:
+        print("SLOW STARTUP: the import is over its target.")
+        status = 1
+
+    if args.compare is None:
+        return status
+
+    with open(args.compare, "r") as infile:
+        baseline = json.load(infile)
+
+    if baseline.get("version") != BENCH_VERSION:
+        print("Baseline benchmark version {} does not match {}, not comparing.".format(baseline.get("version"),
+                                                                                      BENCH_VERSION))
+        return 1
+
+    regressions = compare(results, baseline, threshold=args.threshold)
+    for name, before, after in regressions:
+        print("REGRESSION {}: {:.3f} us/step -> {:.3f} us/step ({:+.1f}%)".format(
+            name, before, after, (after / before - 1.0) * 100.0))
+
+    if not regressions:
+        print("No regressions against {}.".format(args.compare))
+        return status
+
+    return 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-output', type=str)
+    parser.add_argument('-compare', type=str)
+    parser.add_argument('-threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('-repeat', type=int, default=3)
+    parser.add_argument('-import-target', type=float, default=DEFAULT_IMPORT_TARGET_MS)
+    args = parser.parse_args()
+
+    if args.repeat <= 0:
+        raise argparse.ArgumentTypeError("Minimum repeat is 1")
+
+    sys.exit(main(args))
@@ -0,0 +1,90 @@
+#
+# Checkpoint.py periodic checkpoints of a simulator run, so a long run can be resumed where it stopped
+#
+# https://github.com/erikphillips/wumpus_world
+#
+# Usage: python3 Wumpsim.py -trials 10000000 -seed 1 -checkpoint run.ckpt [-checkpoint-interval SECONDS] [-resume]
+#
+# A checkpoint is taken between trials, at most once every interval, and once more when the run is over. It holds
+# the last trial completed, the seed, the total score, the state of the random module, the counts of -solvable,
+# and the state the agent asks to have kept (from PyAgent_GetState, given back to PyAgent_SetState on resume).
+# Every trial is seeded from the seed and its number, so the trials after a resume are the same as if the run had
+# never stopped. A checkpoint is written to a temporary file that then replaces the old one, so a run stopped in
+# the middle of a write leaves the last checkpoint as it was.
+#
+
+
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+
+# The version of the checkpoint format, bumped when its contents change
+CHECKPOINT_VERSION = 1
+
+# The arguments that decide the scores of a run, which must be the same for a run to be resumed
+RESUMED_ARGUMENTS = ("tries", "world", "agent", "remote", "size", "wumpuses", "golds", "solvable")
+
+
+class Checkpointer(object):
+    """ Checkpointer: writes the checkpoint of a run atomically, when one is due """
+
+    def __init__(self, filename, interval):
+        self.filename = filename
+        self.interval = interval
+        self.last_write = time.monotonic()
+        self.num_writes = 0
+
+    def due(self):
+        """ due: return True if the interval has passed since the last checkpoint """
+        return time.monotonic() - self.last_write >= self.interval
+
+    def write(self, checkpoint):
+        """ write: replace the checkpoint file with the checkpoint (a dict), atomically """
+        checkpoint = dict(checkpoint, version=CHECKPOINT_VERSION)
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        handle, temporary = tempfile.mkstemp(prefix=".checkpoint-", dir=directory)
+        try:
+            with os.fdopen(handle, "wb") as outfile:
+                pickle.dump(checkpoint, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+                outfile.flush()
+                os.fsync(outfile.fileno())
+            os.replace(temporary, self.filename)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+        self.last_write = time.monotonic()
+        self.num_writes += 1
+
+
+def read_checkpoint(filename):
+    """ read_checkpoint: return the checkpoint in the file, or None if there is no file """
+    if not os.path.exists(filename):
+        return None
+
+    with open(filename, "rb") as infile:
+        checkpoint = pickle.load(infile)
+    if checkpoint.get("version") != CHECKPOINT_VERSION:
+        print("Invalid checkpoint '{}', expected version {}.".format(filename, CHECKPOINT_VERSION))
+        sys.exit(1)
+    return checkpoint
+
+
+def check_resumable(checkpoint, args):
+    """ check_resumable: exit with a message if the checkpoint's run can't be continued with the arguments """
+    for name in RESUMED_ARGUMENTS:
+        if checkpoint["args"][name] != getattr(args, name):
+            print("The checkpoint was taken with -{} {}, not {}.".format(name, checkpoint["args"][name],
+                                                                        getattr(args, name)))
+            sys.exit(1)
+
+    if args.seed is not None and args.seed != checkpoint["seed"]:
+        print("The checkpoint was taken with -seed {}, not {}.".format(checkpoint["seed"], args.seed))
+        sys.exit(1)
+
+    if args.trials < checkpoint["trial"]:
+        print("The checkpoint is after trial {}, more than -trials {}.".format(checkpoint["trial"], args.trials))
+        sys.exit(1)
@@ -0,0 +1,65 @@
+#
+# Environment.py a reinforcement learning environment over a wumpus world, with a reset and step interface
+#
+# https://github.com/erikphillips/wumpus_world
+#
+# Usage:
+#   env = WumpusEnvironment()
+#   observation = env.reset(seed=1)
+#   observation, reward, terminated, truncated = env.step(action)
+#
+# An observation is the percept packed into an integer of Wumpsim.PERCEPT_BIT_ flags, and the reward of a step is
+# the change in the score. An episode is one try: it is terminated when the agent dies or climbs out, and truncated
+# after MAX_MOVES_PER_GAME actions, the same as Wumpsim.run_trial. VectorEnvironment.py runs many at once.
+#
+
+
+import random
+import Wumpsim
+
+
+class WumpusEnvironment(object):
+    """ WumpusEnvironment: plays one try of a wumpus world per episode, a new world for every reset """
+
+    def __init__(self, worlds=None, max_moves=Wumpsim.MAX_MOVES_PER_GAME):
+        """ __init__: create an environment with random worlds, or cycling through the worlds (a list of layouts,
+                      or a path for Wumpsim.load_worlds) """
+        if isinstance(worlds, str):
+            worlds = Wumpsim.load_worlds(worlds)
+        self.worlds = worlds
+        self.max_moves = max_moves
+        self.num_episodes = 0
+        self.world = None
+        self.score = 0
+
+    def reset(self, seed=None, same_world=False):
+        """ reset: start a new episode, returning its first observation
+
+            A seed reseeds the random module first, so reset(Wumpsim.get_trial_seed(seed, trial)) plays the same world
+            as that trial of the simulator. With same_world, the episode is a new try of the current world. """
+        if seed is not None:
+            random.seed(seed)
+
+        if not same_world or self.world is None:
+            layout = None
+            if self.worlds is not None:
+                layout = self.worlds[self.num_episodes % len(self.worlds)]
+            self.world = Wumpsim.WumpusWorld(file_information=layout)
+
+        self.num_episodes += 1
+        self.world.initialize()
+        self.score = 0
+        return self.world.current_percept.to_bits()
+
+    def step(self, action):
+        """ step: take the action, returning (observation, reward, terminated, truncated) """
+        world = self.world
+        world.execute_action(action)
+
+        score = world.get_score()
+        reward = score - self.score
+        self.score = score
+
+        terminated = world.game_over()
+        truncated = not terminated and world.num_actions >= self.max_moves
+        return world.current_percept.to_bits(), reward, terminated, truncated
@@ -0,0 +1,272 @@
+#
+# EpisodeLog.py streaming logs of every step of every episode, as JSON lines or as binary records
+#
+# https://github.com/erikphillips/wumpus_world
+#
+# A run is logged with -log PATH, in the format chosen by the path:
+#   *.wlog, *.wlog.gz          binary records
+#   anything else              JSON lines
+#   *.gz                       gzip compressed
+#   a path with {trial} in it  a new file for every trial, such as 'episodes/trial{trial}.jsonl.gz'
+#
+# Every log holds, in order:
+#   trial records:  the trial number, its seed, and the world layout
+#   try records:    the try number, at the start of each try
+#   step records:   the percept bits the agent was given, the action it chose, then the agent's x, y and
+#                   orientation and the score after the action
+#
+# JSON lines: a trial is {"trial": N, "seed": S, "size": N, "wumpus": [X, Y], "gold": [X, Y],
+# "pits": [[X, Y], ...]}, a try is {"try": N}, and a step is the list [percept, action, x, y, orientation, score].
+# A world with several wumpuses or golds adds "wumpuses" and "golds", the lists of all of them, to its trial.
+#
+# Binary (little-endian): the magic "WLOG" and version (u16), then each record is a type byte followed by
+#   W  trial: trial (u32), seed (u32), size, wumpus x, wumpus y, gold x, gold y (u16 each), pit count (u32),
+#             then the pits as x, y (u16 each), only for worlds with one wumpus and one gold
+#   T  try:   try (u32)
+#   S  step:  percept, action, orientation (u8 each), x, y (u16 each), score (i32)
+#
+
+
+import gzip
+import json
+import os
+import struct
+import Wumpsim
+
+
+EPISODE_LOG_MAGIC = b"WLOG"
+EPISODE_LOG_VERSION = 1
+
+# The size of the write buffer of each log file
+BUFFER_SIZE = 1 << 20
+
+RECORD_TRIAL = b"W"
+RECORD_TRY = b"T"
+RECORD_STEP = b"S"
+
+_HEADER = struct.Struct("<4sH")
+_TRIAL = struct.Struct("<IIHHHHHI")
+_PIT = struct.Struct("<HH")
+_TRY = struct.Struct("<I")
+_STEP = struct.Struct("<BBBHHi")
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+def is_binary_path(path):
+    """ is_binary_path: return True if the log path is for binary records """
+    return path.endswith(".wlog") or path.endswith(".wlog.gz")
+
+
+def _open_log(filename, mode):
+    """ _open_log: open the log file, compressed if it ends in .gz, with a large buffer """
+    if filename.endswith(".gz"):
+        return gzip.open(filename, mode)
+    return open(filename, mode, buffering=BUFFER_SIZE)
+
+
+def _write_files(path):
+    """ _write_files: a generator that is sent (trial, data) and writes the data to the trial's log file
+
+        A new file is started whenever the trial's file name changes, which is only for a path with {trial}. """
+    binary = is_binary_path(path)
+    outfile = None
+    filename = None
+    try:
+        while True:
+            trial, data = yield
+            trial_filename = path.format(trial=trial)
+            if trial_filename != filename:
+                if outfile is not None:
+                    outfile.close()
+
+                directory = os.path.dirname(trial_filename)
+                if directory and not os.path.isdir(directory):
+                    os.makedirs(directory)
+
+                filename = trial_filename
+                outfile = _open_log(filename, "wb" if binary else "wt")
+                if binary:
+                    outfile.write(_HEADER.pack(EPISODE_LOG_MAGIC, EPISODE_LOG_VERSION))
+            outfile.write(data)
+    finally:
+        if outfile is not None:
+            outfile.close()
+
+
+def _encode_json(sink):
+    """ _encode_json: a generator that is sent (trial, kind, values) records and sends them on as JSON lines """
+    try:
+        while True:
+            trial, kind, values = yield
+            if kind == RECORD_TRY:
+                line = '{{"try":{}}}'.format(values)
+            else:
+                line = json.dumps(values, separators=(",", ":"))
+            sink.send((trial, line + "\n"))
+    finally:
+        sink.close()
+
+
+def _encode_binary(sink):
+    """ _encode_binary: a generator that is sent (trial, kind, values) records and sends them on as binary """
+    try:
+        while True:
+            trial, kind, values = yield
+            if kind == RECORD_STEP:
+                percept, action, x, y, orientation, score = values
+                data = RECORD_STEP + _STEP.pack(percept, action, orientation, x, y, score)
+            elif kind == RECORD_TRY:
+                data = RECORD_TRY + _TRY.pack(values)
+            else:
+                if "wumpuses" in values or "golds" in values:
+                    raise ValueError("a binary episode log only holds worlds with one wumpus and one gold")
+                data = RECORD_TRIAL + _TRIAL.pack(values["trial"], values["seed"], values["size"],
+                                                  values["wumpus"][0], values["wumpus"][1],
+                                                  values["gold"][0], values["gold"][1], len(values["pits"]))
+                data += b"".join(_PIT.pack(x, y) for x, y in values["pits"])
+            sink.send((trial, data))
+    finally:
+        sink.close()
+
+
+def _start(generator):
+    """ _start: advance a new generator to its first yield, so it can be sent values """
+    next(generator)
+    return generator
+
+
+class _RecordedWorld(object):
+    """ _RecordedWorld: passes each call on to the wumpus world, recording every try and every step """
+
+    def __init__(self, wumpus_world, recorder, trial):
+        self._world = wumpus_world
+        self._recorder = recorder
+        self._trial = trial
+        self._try = 0
+
+    def initialize(self):
+        self._world.initialize()
+        self._try += 1
+        self._recorder.record(self._trial, RECORD_TRY, self._try)
+
+    def execute_action(self, action):
+        percept = self._world.current_percept.to_bits()
+        self._world.execute_action(action)
+
+        state = self._world.current_state
+        self._recorder.record(self._trial, RECORD_STEP, [percept, action, state.agent_location.x,
+                                                         state.agent_location.y, state.agent_orientation,
+                                                         self._world.get_score()])
+
+    def __getattr__(self, name):
+        return getattr(self._world, name)
+
+
+class EpisodeRecorder(object):
+    """ EpisodeRecorder: streams a record of every trial, try and step to the log, holding none of them """
+
+    def __init__(self, path):
+        self.path = path
+        encode = _encode_binary if is_binary_path(path) else _encode_json
+        self._pipeline = _start(encode(_start(_write_files(path))))
+
+    def record(self, trial, kind, values):
+        """ record: send a record down the pipeline to the log """
+        self._pipeline.send((trial, kind, values))
+
+    def wrap_world(self, wumpus_world, trial, trial_seed):
+        """ wrap_world: record the world's layout, then return the world with each try and step recorded """
+        state = wumpus_world.current_state
+        record = {
+            "trial": trial,
+            "seed": trial_seed,
+            "size": wumpus_world.world_size,
+            "wumpus": [state.wumpus_location.x, state.wumpus_location.y],
+            "gold": [state.gold_location.x, state.gold_location.y],
+            "pits": [[pit.x, pit.y] for pit in state.pit_locations],
+        }
+
+        # A world with several wumpuses or golds also records all of them
+        if len(state.wumpus_locations) > 1 or len(state.gold_locations) > 1:
+            record["wumpuses"] = [[wumpus.x, wumpus.y] for wumpus in state.wumpus_locations]
+            record["golds"] = [[gold.x, gold.y] for gold in state.gold_locations]
+
+        self.record(trial, RECORD_TRIAL, record)
+        return _RecordedWorld(wumpus_world, self, trial)
+
+    def close(self):
+        """ close: flush and close the log """
+        self._pipeline.close()
+
+
+def _read_json(infile):
+    for line in infile:
+        record = json.loads(line)
+        if isinstance(record, list):
+            yield RECORD_STEP, record
+        elif "try" in record:
+            yield RECORD_TRY, record["try"]
+        else:
+            yield RECORD_TRIAL, record
+
+
+def _read_exact(infile, length):
+    data = infile.read(length)
+    if len(data) != length:
+        raise ValueError("truncated episode log")
+    return data
+
+
+def _read_binary(infile):
+    magic, version = _HEADER.unpack(_read_exact(infile, _HEADER.size))
+    if magic != EPISODE_LOG_MAGIC or version != EPISODE_LOG_VERSION:
+        raise ValueError("not a version {} episode log".format(EPISODE_LOG_VERSION))
+
+    while True:
+        kind = infile.read(1)
+        if len(kind) == 0:
+            return
+
+        if kind == RECORD_STEP:
+            percept, action, orientation, x, y, score = _STEP.unpack(_read_exact(infile, _STEP.size))
+            yield RECORD_STEP, [percept, action, x, y, orientation, score]
+        elif kind == RECORD_TRY:
+            yield RECORD_TRY, _TRY.unpack(_read_exact(infile, _TRY.size))[0]
+        elif kind == RECORD_TRIAL:
+            trial, seed, size, wumpus_x, wumpus_y, gold_x, gold_y, num_pits = \
+                _TRIAL.unpack(_read_exact(infile, _TRIAL.size))
+            pits = [list(pit) for pit in _PIT.iter_unpack(_read_exact(infile, num_pits * _PIT.size))]
+            yield RECORD_TRIAL, {"trial": trial, "seed": seed, "size": size, "wumpus": [wumpus_x, wumpus_y],
+                                 "gold": [gold_x, gold_y], "pits": pits}
+        else:
+            raise ValueError("unknown episode log record {!r}".format(kind))
+
+
+def read_episode_log(filename):
+    """ read_episode_log: generate the (kind, values) records of a log file of either format, one at a time """
+    with open(filename, "rb") as infile:
+        magic = infile.read(2)
+
+    if magic == _GZIP_MAGIC:
+        infile = gzip.open(filename, "rb")
+    else:
+        infile = open(filename, "rb", buffering=BUFFER_SIZE)
+
+    try:
+        if infile.peek(4)[:4] == EPISODE_LOG_MAGIC:
+            for record in _read_binary(infile):
+                yield record
+        else:
+            for line_record in _read_json(line.decode("utf-8") for line in infile):
+                yield line_record
+    finally:
+        infile.close()
+
+
+def layout_from_record(record):
+    """ layout_from_record: return the world layout of a trial record """
+    wumpuses = [Wumpsim.Location(x, y) for x, y in record.get("wumpuses", [record["wumpus"]])]
+    golds = [Wumpsim.Location(x, y) for x, y in record.get("golds", [record["gold"]])]
+    pits = [Wumpsim.Location(x, y) for x, y in record["pits"]]
+    return Wumpsim.WorldLayout(record["size"], wumpuses[0], golds[0], pits, wumpuses, golds)
@@ -0,0 +1,226 @@
+#
+# Evaluate.py scores an agent only for as many trials as it takes to know its average score well enough
+#
+# https://github.com/erikphillips/wumpus_world
+#
+# Usage:
+#   python Evaluate.py [-precision SCORE] [-baseline FILE] [-confidence LEVEL] [-min-trials N] [-report N]
+#                      [-output FILE] [-trials MAX_TRIALS] [any other Wumpsim.py options, such as -agent or -tries]
+#
+# The average score of each trial is added to a running mean and variance (Welford's method), and the confidence
+# interval of the mean is reported as the trials run. The run stops once the interval is narrower than
+# -precision on each side, or, with a -baseline score file, once the agent is better or worse than the baseline
+# at the -confidence level, or after -trials trials.
+#
+# The baseline is compared trial by trial. Trial N plays the same world for the same seed, so the baseline's seed
+# is used, and each difference leaves out how hard the world was (common random numbers), which takes far fewer
+# trials than comparing two independent averages. A baseline is the -output of an earlier run, which keeps the
+# seed, -tries and world options it was made with so that a run with different ones is refused, or the -output of
+# Solver.py (the best score of each world) with the -seed it was made with.
+#
+# The interval is checked after every trial, which makes a wrong early stop a little more likely than the
+# confidence level says; -min-trials keeps the first few trials, when the variance is poorly known, from stopping
+# the run.
+#
+
+
+import argparse
+import json
+import math
+import random
+import statistics
+import sys
+import Wumpsim
+
+
+# The number of trials run before the run may stop
+DEFAULT_MIN_TRIALS = 30
+
+# The most trials run, unless -trials is given
+DEFAULT_MAX_TRIALS = 100000
+
+# The number of trials between progress reports
+DEFAULT_REPORT_EVERY = 100
+
+# The simulator arguments that decide the worlds and scores of a trial, which a baseline must share with the run
+BASELINE_ARGUMENTS = ("tries", "world", "size", "wumpuses", "golds", "solvable")
+
+# The verdicts of a comparison with the baseline
+VERDICT_BETTER = "better than the baseline"
+VERDICT_WORSE = "worse than the baseline"
+VERDICT_UNDECIDED = "not significantly different from the baseline"
+
+
+class RunningStats(object):
+    """ RunningStats: the running mean and variance of a stream of values, by Welford's method """
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # the sum of the squared differences from the mean
+
+    def add(self, value):
+        """ add: add a value to the mean and variance """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def variance(self):
+        """ variance: return the sample variance of the values """
+        if self.count < 2:
+            return 0.0
+        return self.m2 / (self.count - 1)
+
+    def half_width(self, confidence):
+        """ half_width: return the half width of the confidence interval of the mean """
+        if self.count < 2:
+            return math.inf
+        z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2.0)
+        return z * math.sqrt(self.variance() / self.count)
+
+
+def read_baseline(filename):
+    """ read_baseline: return the (settings, scores by trial) of a baseline score file, where the settings are the
+                       seed and BASELINE_ARGUMENTS it was made with, or None for a list of scores such as the -output
+                       of Solver.py """
+    with open(filename, "r") as infile:
+        baseline = json.load(infile)
+    if isinstance(baseline, list):
+        return None, baseline
+    return {name: baseline.get(name) for name in ("seed",) + BASELINE_ARGUMENTS}, baseline["scores"]
+
+
+def check_baseline(settings, simulator_args):
+    """ check_baseline: raise an error if the baseline was made with other BASELINE_ARGUMENTS than the run, as
+                        its trials would not pair up with the run's """
+    for name in BASELINE_ARGUMENTS:
+        if settings[name] != getattr(simulator_args, name):
+            raise argparse.ArgumentTypeError("The baseline was made with -{} {}, not {}".format(
+                name, settings[name], getattr(simulator_args, name)))
+
+
+class Evaluator(object):
+    """ Evaluator: takes the scores of each trial in order, and decides when enough trials have been run """
+
+    def __init__(self, tries, confidence=0.95, precision=None, baseline_scores=None, min_trials=DEFAULT_MIN_TRIALS,
+                 report_every=DEFAULT_REPORT_EVERY, stream=None):
+        self.tries = tries
+        self.confidence = confidence
+        self.precision = precision
+        self.baseline_scores = baseline_scores
+        self.min_trials = min_trials
+        self.report_every = report_every
+        self.stream = stream if stream is not None else sys.stdout
+
+        self.scores = []  # the average score of each trial
+        self.score_stats = RunningStats()
+        self.difference_stats = RunningStats()  # the differences from the baseline, if there is one
+        self.stop_reason = None
+
+    def _tracked(self):
+        """ _tracked: return the stats whose interval decides when to stop """
+        return self.difference_stats if self.baseline_scores is not None else self.score_stats
+
+    def add_trial(self, trial, scores):
+        """ add_trial: add the scores of the trial's tries, returning True once enough trials have been run """
+        score = sum(scores) / self.tries
+        self.scores.append(score)
+        self.score_stats.add(score)
+        if self.baseline_scores is not None:
+            self.difference_stats.add(score - self.baseline_scores[trial - 1])
+
+        if self.report_every and trial % self.report_every == 0:
+            print(self.progress(), file=self.stream)
+
+        if self.baseline_scores is not None and trial >= len(self.baseline_scores):
+            self.stop_reason = "no more baseline trials"
+        elif trial >= self.min_trials:
+            half_width = self._tracked().half_width(self.confidence)
+            if self.precision is not None and half_width <= self.precision:
+                self.stop_reason = "precision reached"
+            elif self.baseline_scores is not None and self.verdict() != VERDICT_UNDECIDED:
+                self.stop_reason = "significant difference"
+        return self.stop_reason is not None
+
+    def verdict(self):
+        """ verdict: return whether the agent is better or worse than the baseline, at the confidence level """
+        stats = self.difference_stats
+        half_width = stats.half_width(self.confidence)
+        if stats.mean - half_width > 0:
+            return VERDICT_BETTER
+        if stats.mean + half_width < 0:
+            return VERDICT_WORSE
+        return VERDICT_UNDECIDED
+
+    def progress(self):
+        """ progress: return a line with the number of trials and the confidence intervals so far """
+        line = "Trial {}: average score = {:.3f} +/- {:.3f}".format(
+            self.score_stats.count, self.score_stats.mean, self.score_stats.half_width(self.confidence))
+        if self.baseline_scores is not None:
+            line += ", difference from the baseline = {:.3f} +/- {:.3f}".format(
+                self.difference_stats.mean, self.difference_stats.half_width(self.confidence))
+        return line
+
+    def report(self):
+        """ report: return the lines describing the result of the run """
+        lines = [self.progress() + " ({:g}% confidence)".format(100.0 * self.confidence)]
+        if self.baseline_scores is not None:
+            lines.append("The agent is {}".format(self.verdict()))
+        lines.append("Stopped: {}".format(self.stop_reason or "maximum trials reached"))
+        return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Any other options are passed on to Wumpsim.py")
+    parser.add_argument('-precision', type=float)
+    parser.add_argument('-baseline', type=str)
+    parser.add_argument('-confidence', type=float, default=0.95)
+    parser.add_argument('-min-trials', type=int, default=DEFAULT_MIN_TRIALS)
+    parser.add_argument('-report', type=int, default=DEFAULT_REPORT_EVERY)
+    parser.add_argument('-output', type=str)
+    parser.add_argument('-trials', type=int, default=DEFAULT_MAX_TRIALS)
+    args, simulator_argv = parser.parse_known_args()
+
+    if not 0.0 < args.confidence < 1.0:
+        raise argparse.ArgumentTypeError("Confidence must be between 0 and 1")
+
+    if args.precision is not None and args.precision <= 0:
+        raise argparse.ArgumentTypeError("Precision must be positive")
+
+    if args.min_trials < 2:
+        raise argparse.ArgumentTypeError("Minimum min-trials is 2")
+
+    simulator_args = Wumpsim.parse_args(simulator_argv + ["-trials", str(args.trials)])
+    if simulator_args.summary or simulator_args.verbose or simulator_args.watch:
+        raise argparse.ArgumentTypeError("The evaluator writes its own output, not the simulator's")
+    simulator_args.quiet = True
+
+    baseline_scores = None
+    if args.baseline is not None:
+        baseline_settings, baseline_scores = read_baseline(args.baseline)
+        baseline_seed = baseline_settings["seed"] if baseline_settings is not None else None
+        if baseline_seed is not None and simulator_args.seed is None:
+            simulator_args.seed = baseline_seed
+        elif baseline_seed is None and simulator_args.seed is None:
+            raise argparse.ArgumentTypeError("A baseline without a seed needs the -seed it was made with")
+        elif baseline_seed is not None and simulator_args.seed != baseline_seed:
+            raise argparse.ArgumentTypeError("The baseline was made with -seed {}".format(baseline_seed))
+        if baseline_settings is not None:
+            check_baseline(baseline_settings, simulator_args)
+
+    if simulator_args.seed is None:
+        simulator_args.seed = random.SystemRandom().getrandbits(32)
+        print("Using seed {}".format(simulator_args.seed))
+
+    evaluator = Evaluator(simulator_args.tries, confidence=args.confidence, precision=args.precision,
+                          baseline_scores=baseline_scores, min_trials=args.min_trials, report_every=args.report)
+    Wumpsim.main(simulator_args, stop_after=evaluator.add_trial)
+    print(evaluator.report())
+
+    if args.output is not None:
+        baseline = {name: getattr(simulator_args, name) for name in BASELINE_ARGUMENTS}
+        with open(args.output, "w") as outfile:
+            json.dump(dict(baseline, seed=simulator_args.seed, scores=evaluator.scores), outfile)
@@ -0,0 +1,174 @@
+#
+# Instrumentation.py per-step timing of the simulator loop
+#
+# https://github.com/erikphillips/wumpus_world
+#
+# With -instrument FILE, the agent and each world are wrapped in timing proxies that add each call's time to a
+# histogram, so the simulator loop itself is unchanged and costs nothing extra when it is not instrumented.
+#
+
+
+import time
+import Wumpsim
+
+
+# The number of histogram buckets, bucket N holds the values with a bit length of N (values below 2 ** N)
+NUM_BUCKETS = 64
+
+
+class Histogram(object):
+    """ Histogram: a log2 bucketed histogram of integer values, such as durations in nanoseconds """
+
+    def __init__(self):
+        self.buckets = [0] * NUM_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        """ add: add a value to the histogram """
+        self.buckets[min(value.bit_length(), NUM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        """ percentile: return the upper bound of the bucket holding the given fraction of the values """
+        if self.count == 0:
+            return None
+
+        target = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return min((1 << bucket) - 1, self.max)
+        return self.max
+
+    def to_dict(self, scale=1.0):
+        """ to_dict: return a summary of the histogram, with each value multiplied by the scale """
+        def scaled(value):
+            return None if value is None else value * scale
+
+        return {
+            "count": self.count,
+            "total": scaled(self.total),
+            "mean": scaled(self.total / self.count) if self.count else None,
+            "min": scaled(self.min),
+            "max": scaled(self.max),
+            "p50": scaled(self.percentile(0.50)),
+            "p90": scaled(self.percentile(0.90)),
+            "p99": scaled(self.percentile(0.99)),
+            "buckets": dict((str(1 << bucket), count) for bucket, count in enumerate(self.buckets) if count),
+        }
+
+
+class _TimedAgent(object):
+    """ _TimedAgent: passes each call on to the agent, timing process() by the action it returns """
+
+    def __init__(self, agent, instrumentation):
+        self._agent = agent
+        self._instrumentation = instrumentation
+
+    def process(self, percept):
+        start = time.perf_counter_ns()
+        action = self._agent.process(percept)
+        self._instrumentation.record("agent.process", action, time.perf_counter_ns() - start)
+        return action
+
+    def __getattr__(self, name):
+        return getattr(self._agent, name)
+
+
+class _TimedWorld(object):
+    """ _TimedWorld: passes each call on to the wumpus world, timing the calls made at every step """
+
+    def __init__(self, wumpus_world, instrumentation):
+        self._world = wumpus_world
+        self._instrumentation = instrumentation
+
+    def initialize(self):
+        self._instrumentation.end_try(self._world)
+        self._world.initialize()
+
+    def get_percept(self):
+        start = time.perf_counter_ns()
+        percept = self._world.get_percept()
+        self._instrumentation.record("get_percept", None, time.perf_counter_ns() - start)
+        return percept
+
+    def execute_action(self, action):
+        start = time.perf_counter_ns()
+        self._world.execute_action(action)
+        self._instrumentation.record("execute_action", action, time.perf_counter_ns() - start)
+
+    def print_world(self, stream=None, redraw=False):
+        start = time.perf_counter_ns()
+        self._world.print_world(stream, redraw)
+        self._instrumentation.record("print_world", None, time.perf_counter_ns() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._world, name)
+
+
+class Instrumentation(object):
+    """ Instrumentation: collects timing histograms for each timed call, overall and by action type """
+
+    def __init__(self):
+        self.timings = {}
+        self.moves_per_try = Histogram()
+        self.num_tries = 0
+        self._world = None
+        self._start = time.perf_counter()
+        self._seconds = None
+
+    def wrap_agent(self, agent):
+        """ wrap_agent: return the agent with its process() calls timed """
+        return _TimedAgent(agent, self)
+
+    def wrap_world(self, wumpus_world, trial=None, trial_seed=None):
+        """ wrap_world: return the wumpus world with its per-step calls timed, counting the moves of each try """
+        self.end_try(None)
+        return _TimedWorld(wumpus_world, self)
+
+    def record(self, name, action, nanoseconds):
+        """ record: add a duration to the histograms of the call, for all actions and for the action's type """
+        by_action = self.timings.get(name)
+        if by_action is None:
+            by_action = self.timings[name] = {}
+
+        keys = ["ALL"] if action is None else ["ALL", Wumpsim.action_to_string(action)]
+        for key in keys:
+            histogram = by_action.get(key)
+            if histogram is None:
+                histogram = by_action[key] = Histogram()
+            histogram.add(nanoseconds)
+
+    def end_try(self, wumpus_world):
+        """ end_try: count the moves of the try that was being played, if any, before the next try starts """
+        if self._world is not None and self._world.num_actions > 0:
+            self.moves_per_try.add(self._world.num_actions)
+            self.num_tries += 1
+        self._world = wumpus_world
+
+    def finish(self):
+        """ finish: count the last try and stop the clock """
+        self.end_try(None)
+        self._seconds = time.perf_counter() - self._start
+
+    def report(self):
+        """ report: return the timings (in microseconds) and the try statistics as a JSON-ready dict """
+        seconds = self._seconds if self._seconds is not None else time.perf_counter() - self._start
+        return {
+            "seconds": seconds,
+            "tries": self.num_tries,
+            "tries_per_sec": self.num_tries / seconds if seconds > 0 else None,
+            "moves_per_try": self.moves_per_try.to_dict(),
+            "timings_us": dict((name, dict((key, histogram.to_dict(scale=1e-3))
+                                           for key, histogram in sorted(by_action.items())))
+                               for name, by_action in sorted(self.timings.items())),
+        }
@@ -0,0 +1,300 @@
+#
+# KnowledgeBase.py what an agent can infer about the cave from its percepts, for logic-based agents
+#
+# https://github.com/erikphillips/wumpus_world
+#
+# Usage, from an agent that tracks its own location:
+#   kb = KnowledgeBase(world_size=4)
+#   kb.tell(x, y, stench, breeze)          # after every move, for the square the agent is on
+#   kb.tell_scream()                       # once the wumpus is killed
+#   kb.is_safe(x, y), kb.safe_unvisited(), kb.pit_probability(x, y), kb.wumpus_probability(x, y)
+#
+# Beliefs are bitsets (Python integers) with one bit per square, the bit of (x, y) is Location.to_index. Each
+# percept only updates the squares next to the agent, and the breeze constraints that share a square with them.
+#
+# Pit probabilities come from enumerating the pit layouts of the frontier (the squares next to a breeze whose
+# pits are not yet known) that explain every breeze, weighted by the pit probability of each square. The
+# frontier is split into independent groups that share no breeze, each group is enumerated on its own, and
+# the result for each group is memoized, for up to MAX_CACHED_GROUPS groups. A group larger than
+# MAX_ENUMERATED_SQUARES is estimated instead, so the cost of a move stays bounded in a large cave.
+#
+
+
+import Wumpsim
+
+
+# The largest group of frontier squares whose pit layouts are enumerated
+MAX_ENUMERATED_SQUARES = 14
+
+# The most groups whose probabilities are memoized, after which the memo is started over
+MAX_CACHED_GROUPS = 4096
+
+
+def _bit_count(bits):
+    """ _bit_count: return the number of set bits """
+    return bin(bits).count("1")
+
+
+def _bit_indices(bits):
+    """ _bit_indices: return the indices of the set bits, lowest first """
+    indices = []
+    while bits:
+        low = bits & -bits
+        indices.append(low.bit_length() - 1)
+        bits ^= low
+    return indices
+
+
+class KnowledgeBase(object):
+    """ KnowledgeBase: the agent's beliefs about which squares hold pits or the wumpus, and which are safe """
+
+    def __init__(self, world_size=Wumpsim.WORLD_SIZE, pit_probability=Wumpsim.PIT_PROBABILITY):
+        self.world_size = world_size
+        self.pit_prior = pit_probability  # the probability of a pit on a square with nothing known about it
+        self.all_squares = (1 << (world_size * world_size)) - 1
+
+        self.visited = 0
+        self.no_pit = 0
+        self.pits = 0
+        self.wumpus_candidates = self.all_squares
+        self.wumpus_alive = True
+
+        # The unresolved breezes: the squares of each breeze that may hold its pit, and the breezes by square
+        self.breezes = {}
+        self.breezes_by_square = {}
+
+        self._group_cache = {}
+
+    def _index(self, x, y):
+        return (x - 1) * self.world_size + (y - 1)
+
+    def _neighbours(self, index):
+        """ _neighbours: return the bitset of the squares next to the square """
+        size = self.world_size
+        x = index // size
+        y = index % size
+        bits = 0
+        if x + 1 < size:
+            bits |= 1 << (index + size)
+        if x > 0:
+            bits |= 1 << (index - size)
+        if y + 1 < size:
+            bits |= 1 << (index + 1)
+        if y > 0:
+            bits |= 1 << (index - 1)
+        return bits
+
+    def tell(self, x, y, stench, breeze, glitter=False, bump=False, scream=False):
+        """ tell: add the percepts the agent had on (x, y), and everything that follows from them """
+        index = self._index(x, y)
+        neighbours = self._neighbours(index)
+        square = 1 << index
+
+        if scream:
+            self.tell_scream()
+
+        newly_visited = not self.visited & square
+        self.visited |= square
+        self.wumpus_candidates &= ~square
+
+        # A stench means the wumpus is next to the square, and no stench that it isn't
+        if self.wumpus_alive:
+            if stench:
+                self.wumpus_candidates &= neighbours
+            else:
+                self.wumpus_candidates &= ~neighbours
+
+        if newly_visited:
+            self._add_no_pit(square | (0 if breeze else neighbours))
+            if breeze:
+                self._add_breeze(index, neighbours)
+
+    def tell_scream(self):
+        """ tell_scream: the wumpus is dead, so no square holds a live wumpus """
+        self.wumpus_alive = False
+        self.wumpus_candidates = 0
+
+    def _add_no_pit(self, bits):
+        """ _add_no_pit: mark the squares as holding no pit, and narrow down the breezes next to them """
+        bits &= ~self.no_pit
+        if not bits:
+            return
+        self.no_pit |= bits
+
+        for index in _bit_indices(bits):
+            for breeze in list(self.breezes_by_square.get(index, ())):
+                if breeze in self.breezes:
+                    self._narrow_breeze(breeze)
+
+    def _add_breeze(self, breeze, neighbours):
+        """ _add_breeze: add the breeze on the square, whose pit is in one of the neighbouring squares """
+        if neighbours & self.pits:
+            return  # already explained by a known pit
+        self.breezes[breeze] = neighbours
+        for index in _bit_indices(neighbours):
+            self.breezes_by_square.setdefault(index, set()).add(breeze)
+        self._narrow_breeze(breeze)
+
+    def _unindex_breeze(self, breeze, bits):
+        """ _unindex_breeze: remove the breeze from the breezes by square of the squares """
+        for index in _bit_indices(bits):
+            by_square = self.breezes_by_square[index]
+            by_square.discard(breeze)
+            if not by_square:
+                del self.breezes_by_square[index]
+
+    def _remove_breeze(self, breeze):
+        self._unindex_breeze(breeze, self.breezes.pop(breeze))
+
+    def _narrow_breeze(self, breeze):
+        """ _narrow_breeze: drop the squares of the breeze that hold no pit, marking its pit once only one is left """
+        candidates = self.breezes[breeze] & ~self.no_pit
+        self._unindex_breeze(breeze, self.breezes[breeze] & self.no_pit)
+        self.breezes[breeze] = candidates
+        if candidates & (candidates - 1):
+            return
+        if not candidates:
+            self._remove_breeze(breeze)  # the percepts contradict each other, so there is nothing to infer
+            return
+
+        # Only one square can hold the pit, so it does, and every breeze next to it is explained
+        self.pits |= candidates
+        for index in _bit_indices(candidates):
+            for explained in list(self.breezes_by_square.get(index, ())):
+                self._remove_breeze(explained)
+
+    def is_pit(self, x, y):
+        """ is_pit: return True if the square is known to hold a pit """
+        return (self.pits >> self._index(x, y)) & 1 == 1
+
+    def is_wumpus(self, x, y):
+        """ is_wumpus: return True if the square is known to hold the live wumpus """
+        return self.wumpus_candidates == 1 << self._index(x, y)
+
+    def is_safe(self, x, y):
+        """ is_safe: return True if the square is known to hold neither a pit nor the live wumpus """
+        index = self._index(x, y)
+        return (self.no_pit >> index) & 1 == 1 and (self.wumpus_candidates >> index) & 1 == 0
+
+    def safe_squares(self):
+        """ safe_squares: return the bitset of the squares known to be safe """
+        return self.no_pit & ~self.wumpus_candidates
+
+    def safe_unvisited(self):
+        """ safe_unvisited: return the (x, y) of every safe square the agent has not been to """
+        size = self.world_size
+        return [(index // size + 1, index % size + 1)
+                for index in _bit_indices(self.safe_squares() & ~self.visited)]
+
+    def wumpus_probability(self, x, y):
+        """ wumpus_probability: return the probability of the live wumpus being on the square """
+        if not (self.wumpus_candidates >> self._index(x, y)) & 1:
+            return 0.0
+        return 1.0 / _bit_count(self.wumpus_candidates)
+
+    def pit_probability(self, x, y):
+        """ pit_probability: return the probability of a pit on the square, given every breeze so far """
+        index = self._index(x, y)
+        if (self.pits >> index) & 1:
+            return 1.0
+        if (self.no_pit >> index) & 1:
+            return 0.0
+        if index not in self.breezes_by_square:
+            return self.pit_prior
+
+        group_breezes = self._group(index)
+        return self._group_probabilities(group_breezes)[index]
+
+    def pit_probabilities(self):
+        """ pit_probabilities: return the pit probability of every frontier square, by its (x, y) """
+        size = self.world_size
+        probabilities = {}
+        remaining = set(self.breezes_by_square)
+        while remaining:
+            group_breezes = self._group(next(iter(remaining)))
+            for index, probability in self._group_probabilities(group_breezes).items():
+                probabilities[(index // size + 1, index % size + 1)] = probability
+                remaining.discard(index)
+        return probabilities
+
+    def _group(self, index):
+        """ _group: return the sorted breeze masks of the group of frontier squares linked to the square """
+        breezes = set()
+        squares = [index]
+        seen = {index}
+        while squares:
+            for breeze in self.breezes_by_square.get(squares.pop(), ()):
+                if breeze in breezes:
+                    continue
+                breezes.add(breeze)
+                for next_index in _bit_indices(self.breezes[breeze]):
+                    if next_index not in seen:
+                        seen.add(next_index)
+                        squares.append(next_index)
+        return tuple(sorted(self.breezes[breeze] for breeze in breezes))
+
+    def _group_probabilities(self, masks):
+        """ _group_probabilities: return the pit probability of each square of a group, by its index """
+        probabilities = self._group_cache.get(masks)
+        if probabilities is None:
+            squares = 0
+            for mask in masks:
+                squares |= mask
+            indices = _bit_indices(squares)
+            if len(indices) <= MAX_ENUMERATED_SQUARES:
+                probabilities = self._enumerate(indices, masks)
+            else:
+                probabilities = self._estimate(indices, masks)
+            if len(self._group_cache) >= MAX_CACHED_GROUPS:
+                self._group_cache.clear()  # most are groups of breezes that have since been narrowed
+            self._group_cache[masks] = probabilities
+        return probabilities
+
+    def _enumerate(self, indices, masks):
+        """ _enumerate: return the exact pit probabilities of the squares, over every pit layout that has a pit in
+                        each mask """
+        p = self.pit_prior
+        count = len(indices)
+
+        # Each breeze as a mask over the positions of its squares in indices, and the last position it covers
+        local_masks = []
+        for mask in masks:
+            local = 0
+            for position, index in enumerate(indices):
+                if (mask >> index) & 1:
+                    local |= 1 << position
+            local_masks.append(local)
+        closed_at = [[] for _ in range(count)]
+        for local in local_masks:
+            closed_at[local.bit_length() - 1].append(local)
+
+        pit_weights = [0.0] * count
+        total = [0.0]
+
+        def place(position, layout, weight):
+            if position == count:
+                total[0] += weight
+                for bit in range(count):
+                    if (layout >> bit) & 1:
+                        pit_weights[bit] += weight
+                return
+            for has_pit in (0, 1):
+                next_layout = layout | (has_pit << position)
+                # Every breeze whose squares are all placed must have a pit
+                if all(local & next_layout for local in closed_at[position]):
+                    place(position + 1, next_layout, weight * (p if has_pit else 1.0 - p))
+
+        place(0, 0, 1.0)
+        return dict((index, pit_weights[position] / total[0]) for position, index in enumerate(indices))
+
+    def _estimate(self, indices, masks):
+        """ _estimate: return pit probabilities for a group too large to enumerate, from each breeze on its own """
+        p = self.pit_prior
+        probabilities = dict((index, p) for index in indices)
+        for mask in masks:
+            # A breeze over n squares has a pit in each with probability p / (1 - (1 - p) ** n)
+            squares = _bit_indices(mask)
+            estimate = p / (1.0 - (1.0 - p) ** len(squares))
+            for index in squares:
+                probabilities[index] = max(probabilities[index], estimate)
+        return probabilities
@@ -0,0 +1,114 @@
+#
+# PolicyTable.py caches an agent's actions by the percepts it has had since the start of the try
+#
+# https://github.com/erikphillips/wumpus_world
+#
+# Usage: python3 Wumpsim.py -world testworld.txt -tries 1000 -compile
+#
+# With -compile, the simulator wraps the agent in a CompiledAgent. It is for agents whose action depends only on the
+# percepts since PyAgent_Initialize, such as any deterministic agent that doesn't learn between tries. The first
+# time the agent meets a history of percepts its action is stored in a trie, and every later try that follows the
+# same history is played from the trie without calling the agent. When a try leaves the trie, the live agent is
+# first given the percepts it missed, so it carries on exactly as if it had played the whole try.
+#
+
+
+import Wumpsim
+
+
+class PolicyTable(object):
+    """ PolicyTable: a trie of actions, where each node maps percept bits to (action, the node after it) """
+
+    def __init__(self):
+        self.root = {}
+        self.num_nodes = 0
+        self.num_hits = 0
+        self.num_misses = 0
+
+    def get_counts(self):
+        """ get_counts: return the (entries, hits, misses) of the table """
+        return self.num_nodes, self.num_hits, self.num_misses
+
+    def add_counts(self, counts):
+        """ add_counts: add the (entries, hits, misses) of another table, such as a worker's, to this table's """
+        num_nodes, num_hits, num_misses = counts
+        self.num_nodes += num_nodes
+        self.num_hits += num_hits
+        self.num_misses += num_misses
+
+    def report(self, num_workers=1):
+        """ report: return a line describing the size of the table and how many actions came from it
+
+            With workers, the counts are those of every worker's table added together. The workers fill in many of
+            the same entries, so the entries are labelled as a sum rather than the size of any one table. """
+        num_actions = self.num_hits + self.num_misses
+        entries = "{} entries".format(self.num_nodes)
+        if num_workers > 1:
+            entries += " (summed over the tables of {} workers)".format(num_workers)
+        return "Policy table: {}, {} of {} actions ({:.1f}%) played from the table".format(
+            entries, self.num_hits, num_actions, 100.0 * self.num_hits / num_actions if num_actions else 0.0)
+
+
+class CompiledAgent(object):
+    """ CompiledAgent: plays the agent's actions from the policy table, calling the agent only for new histories """
+
+    def __init__(self, agent, table=None):
+        self.agent = agent
+        self.table = table if table is not None else PolicyTable()
+        self._node = None
+        self._history = []
+        self._live = False
+
+    def set_output(self, output):
+        self.agent.set_output(output)
+
+    def construct(self):
+        self.agent.construct()
+
+    def initialize(self):
+        """ initialize: start a new try at the root of the table """
+        self.agent.initialize()
+        self._node = self.table.root
+        self._history = []
+        self._live = False
+
+    def process(self, percept):
+        """ process: return the action from the table for the history of percepts, or else from the agent """
+        bits = percept.to_bits()
+
+        if not self._live:
+            entry = self._node.get(bits)
+            if entry is not None:
+                self.table.num_hits += 1
+                self._history.append(bits)
+                self._node = entry[1]
+                return entry[0]
+
+            # The history is new, so catch the agent up on the percepts it was not given
+            for past in self._history:
+                self.agent.process(Wumpsim.Percept.from_bits(past))
+            self._live = True
+
+        self.table.num_misses += 1
+        action = self.agent.process(percept)
+
+        child = {}
+        self._node[bits] = (action, child)
+        self._node = child
+        self.table.num_nodes += 1
+        return action
+
+    def game_over(self, score):
+        self.agent.game_over(score)
+
+    def destructor(self):
+        self.agent.destructor()
+
+    def get_state(self):
+        return Wumpsim.get_agent_state(self.agent)
+
+    def set_state(self, state):
+        Wumpsim.set_agent_state(self.agent, state)
+
+    def close(self):
+        self.agent.close()
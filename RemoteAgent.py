@@ -0,0 +1,296 @@
+#
+# RemoteAgent.py runs an agent in its own process, talking to the simulator over a pipe or a socket
+#
+# https://github.com/erikphillips/wumpus_world
+#
+# Usage:
+#   python RemoteAgent.py -agent PyAgent -port 5000   # serve the agent on a socket, until interrupted
+#   python RemoteAgent.py -agent PyAgent -stdio       # serve the agent over stdin and stdout
+#   python Wumpsim.py -remote localhost:5000          # run the simulator with the served agent
+#
+# The agent module is imported once by the server and stays loaded for every trial and every connection.
+# The server can hold many instances of the agent (slots), so the percepts of many worlds can be sent in a
+# single message, and their actions returned in a single reply. Slot 0 is the imported module, the other
+# slots are fresh copies of it.
+#
+# Messages (little-endian), each is an opcode (1 byte) followed by its payload:
+#   C, I, D  construct, initialize or destruct:  count (u32), then count slots (u32 each)
+#   P        process:   count (u32), then count of slot (u32) and percept bits (u8),
+#                       replied to with count actions (u8)
+#   G        game over: count (u32), then count of slot (u32) and score (i32)
+#   V        verbose:   flag (u8), whether the agent should write its own output
+#   Q        quit:      no payload, the server closes the connection
+#
+
+
+from Action import *
+import socket
+import struct
+import subprocess
+import sys
+import Wumpsim
+
+
+OP_CONSTRUCT = b"C"
+OP_INITIALIZE = b"I"
+OP_DESTRUCT = b"D"
+OP_PROCESS = b"P"
+OP_GAME_OVER = b"G"
+OP_VERBOSE = b"V"
+OP_QUIT = b"Q"
+
+# The agent function called for each slot of a construct, initialize or destruct message
+_SLOT_FUNCTIONS = {OP_CONSTRUCT: "PyAgent_Constructor", OP_INITIALIZE: "PyAgent_Initialize",
+                   OP_DESTRUCT: "PyAgent_Destructor"}
+
+_COUNT = struct.Struct("<I")
+_SLOT = struct.Struct("<I")
+_PERCEPT = struct.Struct("<IB")
+_SCORE = struct.Struct("<Ii")
+_FLAG = struct.Struct("<B")
+
+
+def _read_exact(stream, length):
+    """ _read_exact: read exactly length bytes from the stream, or return None if the stream is closed """
+    data = stream.read(length)
+    if len(data) < length:
+        return None
+    return data
+
+
+class RemoteAgent(object):
+    """ RemoteAgent: an agent served by another process, used by the simulator the same way as an Agent """
+
+    def __init__(self, instream, outstream, process=None, connection=None):
+        self._instream = instream
+        self._outstream = outstream
+        self._process = process
+        self._connection = connection
+
+    @classmethod
+    def connect(cls, host, port):
+        """ connect: return a remote agent for the agent server at the host and port """
+        connection = socket.create_connection((host, port))
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return cls(connection.makefile("rb"), connection.makefile("wb"), connection=connection)
+
+    @classmethod
+    def spawn(cls, agent_name="PyAgent"):
+        """ spawn: start a local agent server for the agent module over a pipe, returning its remote agent """
+        process = subprocess.Popen([sys.executable, __file__, "-agent", agent_name, "-stdio"],
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        return cls(process.stdout, process.stdin, process=process)
+
+    def _send_slots(self, opcode, slots):
+        self._outstream.write(opcode + _COUNT.pack(len(slots)) + b"".join(_SLOT.pack(slot) for slot in slots))
+
+    def set_output(self, output):
+        """ set_output: let the agent know if it should write its own per-step output """
+        self._outstream.write(OP_VERBOSE + _FLAG.pack(output.level >= Wumpsim.OUTPUT_VERBOSE))
+
+    def construct(self, slots=(0,)):
+        """ construct: call the constructor method of the agent in each slot """
+        self._send_slots(OP_CONSTRUCT, slots)
+
+    def initialize(self, slots=(0,)):
+        """ initialize: call the initialize method of the agent in each slot """
+        self._send_slots(OP_INITIALIZE, slots)
+
+    def process(self, percept):
+        """ process: return the action of the agent in slot 0 for the percept """
+        return self.process_batch([(0, percept.to_bits())])[0]
+
+    def process_batch(self, percepts):
+        """ process_batch: return the actions for a list of (slot, percept bits), with one round trip """
+        self._outstream.write(OP_PROCESS + _COUNT.pack(len(percepts)) +
+                              b"".join(_PERCEPT.pack(slot, bits) for slot, bits in percepts))
+
+        # Only a process message is replied to, so this is the only time the buffered messages are sent
+        self._outstream.flush()
+
+        actions = _read_exact(self._instream, len(percepts))
+        if actions is None:
+            print("The agent server closed the connection.")
+            sys.exit(1)
+        return list(bytearray(actions))
+
+    def game_over(self, score):
+        """ game_over: pass the final score to the agent in slot 0 """
+        self.game_over_batch([(0, score)])
+
+    def game_over_batch(self, scores):
+        """ game_over_batch: pass a list of (slot, score) final scores to the agents """
+        self._outstream.write(OP_GAME_OVER + _COUNT.pack(len(scores)) +
+                              b"".join(_SCORE.pack(slot, score) for slot, score in scores))
+
+    def destructor(self, slots=(0,)):
+        """ destructor: call the destructor of the agent in each slot """
+        self._send_slots(OP_DESTRUCT, slots)
+
+    def close(self):
+        """ close: tell the server the simulation is over, then close the connection """
+        self._outstream.write(OP_QUIT)
+        self._outstream.flush()
+        self._outstream.close()
+        self._instream.close()
+
+        if self._connection is not None:
+            self._connection.close()
+        if self._process is not None:
+            self._process.wait()
+
+
+def run_batch_try(batch, agent, max_moves=Wumpsim.MAX_MOVES_PER_GAME):
+    """ run_batch_try: play a try in every world of a BatchWumpusWorld, with the agent in slot N playing world N
+
+        Only the worlds that are still playing are sent to the agent, and the final scores are returned. """
+    slots = list(range(batch.num_worlds))
+    batch.initialize()
+    agent.initialize(slots)
+
+    weights = [1 << column for column in range(5)]  # the PERCEPT_BIT_ order matches the percept columns
+    actions = [GOFORWARD] * batch.num_worlds  # the worlds that are no longer playing ignore their action
+    num_moves = 0
+
+    game_over = batch.game_over()
+    while not game_over.all() and num_moves < max_moves:
+        percepts = batch.get_percepts()
+        playing = [slot for slot in slots if not game_over[slot]]
+        bits = [sum(weight for weight, value in zip(weights, percepts[slot]) if value) for slot in playing]
+
+        for slot, action in zip(playing, agent.process_batch(list(zip(playing, bits)))):
+            actions[slot] = action
+
+        batch.execute_actions(actions)
+        game_over = batch.game_over()
+        num_moves += 1
+
+    scores = batch.get_scores()
+    agent.game_over_batch([(slot, int(scores[slot])) for slot in slots])
+    return scores
+
+
+class AgentServer(object):
+    """ AgentServer: serves the agent module, keeping it (and any copies made for extra slots) loaded """
+
+    def __init__(self, agent_name):
+        self.agent_name = agent_name
+        self.slots = [Wumpsim.load_agent_module(agent_name)]
+        self.verbose = True
+
+    def _get_slot(self, slot):
+        while slot >= len(self.slots):
+            copy = Wumpsim.load_agent_module(self.agent_name, fresh=True)
+            copy.VERBOSE = self.verbose
+            self.slots.append(copy)
+        return self.slots[slot]
+
+    def _read_records(self, instream, record):
+        """ _read_records: read a count and then that many records from the stream, returning the unpacked records,
+                           or None if the stream is closed partway """
+        count = _read_exact(instream, _COUNT.size)
+        if count is None:
+            return None
+        data = _read_exact(instream, _COUNT.unpack(count)[0] * record.size)
+        if data is None:
+            return None
+        return list(record.iter_unpack(data))
+
+    def _read_slots(self, instream):
+        """ _read_slots: read a list of slots from the stream, returning their agent modules, or None if the stream is
+                         closed partway """
+        slots = self._read_records(instream, _SLOT)
+        if slots is None:
+            return None
+        return [self._get_slot(slot) for (slot,) in slots]
+
+    def serve(self, instream, outstream):
+        """ serve: handle messages from the stream until a quit message, or the stream is closed, even partway
+                   through a message """
+        while True:
+            opcode = instream.read(1)
+            if len(opcode) == 0 or opcode == OP_QUIT:
+                return
+
+            if opcode == OP_PROCESS:
+                percepts = self._read_records(instream, _PERCEPT)
+                if percepts is None:
+                    return
+                actions = bytearray()
+                for slot, bits in percepts:
+                    percept = Wumpsim.Percept.from_bits(bits)
+                    actions.append(self._get_slot(slot).PyAgent_Process(percept.stench, percept.breeze,
+                                                                        percept.glitter, percept.bump,
+                                                                        percept.scream))
+                outstream.write(bytes(actions))
+                outstream.flush()
+            elif opcode == OP_GAME_OVER:
+                scores = self._read_records(instream, _SCORE)
+                if scores is None:
+                    return
+                for slot, score in scores:
+                    self._get_slot(slot).PyAgent_GameOver(score)
+            elif opcode in _SLOT_FUNCTIONS:
+                modules = self._read_slots(instream)
+                if modules is None:
+                    return
+                for module in modules:
+                    getattr(module, _SLOT_FUNCTIONS[opcode])()
+            elif opcode == OP_VERBOSE:
+                flag = _read_exact(instream, _FLAG.size)
+                if flag is None:
+                    return
+                self.verbose = _FLAG.unpack(flag)[0] != 0
+                for module in self.slots:
+                    module.VERBOSE = self.verbose
+            else:
+                print("Unknown agent server message {!r}.".format(opcode), file=sys.stderr)
+                return
+
+    def serve_socket(self, host, port):
+        """ serve_socket: serve one connection at a time on the host and port, until interrupted """
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind((host, port))
+        listener.listen(1)
+
+        while True:
+            connection, _ = listener.accept()
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            instream = connection.makefile("rb")
+            outstream = connection.makefile("wb")
+            try:
+                self.serve(instream, outstream)
+            finally:
+                instream.close()
+                outstream.close()
+                connection.close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-agent', type=str, default='PyAgent')
+    parser.add_argument('-host', type=str, default='localhost')
+    parser.add_argument('-port', type=int)
+    parser.add_argument('-stdio', action='store_true')
+    args = parser.parse_args()
+
+    if (args.port is None) == (not args.stdio):
+        raise argparse.ArgumentTypeError("Exactly one of -port or -stdio is required")
+
+    try:
+        server = AgentServer(args.agent)
+    except ImportError as error:
+        print("{}.".format(error))
+        sys.exit(1)
+
+    if args.stdio:
+        # The messages use stdout, so anything the agent prints goes to stderr instead
+        instream = sys.stdin.buffer
+        outstream = sys.stdout.buffer
+        sys.stdout = sys.stderr
+        server.serve(instream, outstream)
+    else:
+        server.serve_socket(args.host, args.port)
@@ -0,0 +1,174 @@
+#
+# Replay.py deterministic replay of the episodes recorded by EpisodeLog.py, with no agent and no printing
+#
+# https://github.com/erikphillips/wumpus_world
+#
+# Usage:
+#   python Replay.py LOG                                   # validate every episode in the log
+#   python Replay.py LOG -trial N -try N -step K          # print the world after step K of an episode
+#
+
+
+import sys
+import EpisodeLog
+import Wumpsim
+
+
+# Snapshots are kept every this many steps, so seeking never replays more than this many actions
+DEFAULT_SNAPSHOT_INTERVAL = 32
+
+
+class Episode(object):
+    """ Episode: a single recorded try, its world layout and its list of recorded steps """
+
+    def __init__(self, trial, trial_seed, try_number, layout, steps):
+        self.trial = trial
+        self.trial_seed = trial_seed
+        self.try_number = try_number
+        self.layout = layout
+        self.steps = steps  # each step is [percept bits, action, x, y, orientation, score]
+
+
+def read_episodes(filename):
+    """ read_episodes: generate the episodes of an episode log, holding only one episode at a time """
+    trial_record = None
+    layout = None
+    try_number = None
+    steps = []
+
+    for kind, values in EpisodeLog.read_episode_log(filename):
+        if kind == EpisodeLog.RECORD_STEP:
+            steps.append(values)
+            continue
+
+        if try_number is not None:
+            yield Episode(trial_record["trial"], trial_record["seed"], try_number, layout, steps)
+            try_number = None
+            steps = []
+
+        if kind == EpisodeLog.RECORD_TRY:
+            try_number = values
+        else:
+            trial_record = values
+            layout = EpisodeLog.layout_from_record(values)
+
+    if try_number is not None:
+        yield Episode(trial_record["trial"], trial_record["seed"], try_number, layout, steps)
+
+
+class Replay(object):
+    """ Replay: re-drives a wumpus world through a recorded episode, keeping snapshots to seek quickly """
+
+    def __init__(self, episode, snapshot_interval=DEFAULT_SNAPSHOT_INTERVAL):
+        self.episode = episode
+        self.snapshot_interval = snapshot_interval
+        self.world = Wumpsim.WumpusWorld(file_information=episode.layout)
+        self.world.initialize()
+        self.step = 0  # the number of recorded actions executed so far
+        self._snapshots = [self.world.snapshot()]  # snapshot N is the state after N * snapshot_interval actions
+
+    def _advance(self):
+        """ _advance: execute the next recorded action, keeping a snapshot at every interval """
+        self.world.execute_action(self.episode.steps[self.step][1])
+        self.step += 1
+        if self.step % self.snapshot_interval == 0 and self.step // self.snapshot_interval == len(self._snapshots):
+            self._snapshots.append(self.world.snapshot())
+
+    def seek(self, step):
+        """ seek: put the world into its state after the given number of recorded actions """
+        if not 0 <= step <= len(self.episode.steps):
+            raise IndexError("step {} is outside of the episode's {} steps".format(step, len(self.episode.steps)))
+
+        # Start from the latest snapshot at or before the step, unless the world is already closer
+        index = min(step // self.snapshot_interval, len(self._snapshots) - 1)
+        if not (index * self.snapshot_interval <= self.step <= step):
+            self.world.restore(self._snapshots[index])
+            self.step = index * self.snapshot_interval
+
+        while self.step < step:
+            self._advance()
+
+        return self.world
+
+    def check_step(self, step):
+        """ check_step: return a description of how recorded step number step (from 0) differs, or None """
+        percept, action, x, y, orientation, score = self.episode.steps[step]
+
+        self.seek(step)
+        if self.world.current_percept.to_bits() != percept:
+            return "step {}: percept {} was recorded, replay has {}".format(step, percept,
+                                                                           self.world.current_percept.to_bits())
+
+        self.seek(step + 1)
+        state = self.world.current_state
+        replayed = [state.agent_location.x, state.agent_location.y, state.agent_orientation, self.world.get_score()]
+        if replayed != [x, y, orientation, score]:
+            return "step {}: {} recorded (x, y, orientation, score) {}, replay has {}".format(
+                step, Wumpsim.action_to_string(action), [x, y, orientation, score], replayed)
+
+        return None
+
+    def validate(self):
+        """ validate: replay the whole episode, returning the description of the first difference, or None """
+        for step in range(len(self.episode.steps)):
+            difference = self.check_step(step)
+            if difference is not None:
+                return difference
+        return None
+
+    def bisect(self, is_bad):
+        """ bisect: return the first step after which is_bad(world) is True, or None if it never is
+
+            is_bad must stay True once it becomes True, such as 'the agent has shot the arrow'. """
+        low = 0
+        high = len(self.episode.steps)
+        if not is_bad(self.seek(high)):
+            return None
+
+        while low < high:
+            middle = (low + high) // 2
+            if is_bad(self.seek(middle)):
+                high = middle
+            else:
+                low = middle + 1
+
+        return low
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('log', type=str)
+    parser.add_argument('-trial', type=int)
+    parser.add_argument('-try', dest='try_number', type=int, default=1)
+    parser.add_argument('-step', type=int)
+    args = parser.parse_args()
+
+    if args.step is not None:
+        if args.trial is None:
+            raise argparse.ArgumentTypeError("-step requires -trial")
+
+        for episode in read_episodes(args.log):
+            if episode.trial == args.trial and episode.try_number == args.try_number:
+                Replay(episode).seek(args.step).print_world()
+                break
+        else:
+            print("Trial {}, Try {} is not in the log.".format(args.trial, args.try_number))
+            sys.exit(1)
+        sys.exit(0)
+
+    num_episodes = 0
+    num_different = 0
+    for episode in read_episodes(args.log):
+        if args.trial is not None and episode.trial != args.trial:
+            continue
+
+        num_episodes += 1
+        difference = Replay(episode).validate()
+        if difference is not None:
+            num_different += 1
+            print("Trial {}, Try {}: {}".format(episode.trial, episode.try_number, difference))
+
+    print("Replayed {} episodes, {} differ from the log.".format(num_episodes, num_different))
+    sys.exit(1 if num_different else 0)
@@ -0,0 +1,330 @@
+#
+# Solver.py the best score an agent could get in a world, if it knew the whole layout
+#
+# https://github.com/erikphillips/wumpus_world
+#
+# Usage:
+#   python Solver.py -world WORLD [-workers N] [-output FILE]               # every world of a file, directory or pack
+#   python Solver.py -trials N [-seed SEED] [-workers N] [-output FILE]     # the random worlds Wumpsim plays
+#
+# The solver searches over the agent's square, orientation, whether it holds the gold and whether it has killed
+# the wumpus. Every action costs 1 and shooting the wumpus costs 10, so the search visits the states in order of
+# cost (a queue with a bucket for each cost), and the first time the agent is back at (1,1) with the gold it
+# climbs out with the best score. Missing with the arrow never helps, so the only shots searched are the ones
+# that kill the wumpus. If the gold can't be brought out, the best score is -1, from climbing out at once.
+#
+
+
+from Action import *
+from Orientation import *
+import functools
+import random
+import Wumpsim
+
+
+# The score for climbing out at once, the best an agent can do when the gold can't be brought out
+NO_GOLD_SCORE = -1
+
+# The number of distinct worlds whose solutions are kept, so repeated worlds in a corpus are solved once
+CACHE_SIZE = 1 << 16
+
+# The cost of shooting, the action itself and the lost arrow
+SHOOT_COST = 10
+
+
+class Solution(object):
+    """ Solution: the best score for a world, and the actions that get it """
+
+    __slots__ = ("score", "actions")
+
+    def __init__(self, score, actions):
+        self.score = score
+        self.actions = actions
+
+
+def layout_key(layout):
+    """ layout_key: return a hashable key that is the same for every copy of the world layout """
+    if not Wumpsim.has_one_wumpus_and_gold(layout):
+        raise ValueError("only worlds with one wumpus and one gold can be solved")
+    size = layout.world_size
+    pit_indices = getattr(layout, "pit_indices", None)
+    if pit_indices is not None:
+        pits = tuple(int(index) for index in pit_indices)
+    else:
+        pits = tuple(sorted(pit.to_index(size) for pit in layout.pit_locations))
+    return (size, layout.wumpus_location.x, layout.wumpus_location.y, layout.gold_location.x,
+            layout.gold_location.y, pits)
+
+
+@functools.lru_cache(maxsize=None)
+def _move_tables(size):
+    """ _move_tables: return the position (square * 4 + orientation) after GOFORWARD (-1 for a bump), TURNLEFT and
+                      TURNRIGHT from each position of a world of the size """
+    forward = [-1] * (size * size * 4)
+    left = [0] * (size * size * 4)
+    right = [0] * (size * size * 4)
+    for index in range(size * size):
+        x = index // size + 1
+        y = index % size + 1
+        for orientation, (move_x, move_y) in Wumpsim.FORWARD_MOVES.items():
+            position = index * 4 + orientation
+            if 1 <= x + move_x <= size and 1 <= y + move_y <= size:
+                forward[position] = ((x + move_x - 1) * size + (y + move_y - 1)) * 4 + orientation
+            left[position] = index * 4 + Wumpsim.LEFT_TURNS[orientation]
+            right[position] = index * 4 + Wumpsim.RIGHT_TURNS[orientation]
+    return forward, left, right
+
+
+def _firing_positions(size, wumpus_x, wumpus_y):
+    """ _firing_positions: return the positions from which an arrow hits the wumpus """
+    positions = set()
+    for x in range(1, size + 1):
+        if x < wumpus_x:
+            positions.add(((x - 1) * size + (wumpus_y - 1)) * 4 + RIGHT)
+        elif x > wumpus_x:
+            positions.add(((x - 1) * size + (wumpus_y - 1)) * 4 + LEFT)
+    for y in range(1, size + 1):
+        if y < wumpus_y:
+            positions.add(((wumpus_x - 1) * size + (y - 1)) * 4 + UP)
+        elif y > wumpus_y:
+            positions.add(((wumpus_x - 1) * size + (y - 1)) * 4 + DOWN)
+    return positions
+
+
+def _search(key):
+    """ _search: return the Solution for the world with the layout key """
+    size, wumpus_x, wumpus_y, gold_x, gold_y, pits = key
+
+    def square(x, y):
+        return (x - 1) * size + (y - 1) if 1 <= x <= size and 1 <= y <= size else -1
+
+    wumpus = square(wumpus_x, wumpus_y)
+    gold = square(gold_x, gold_y)
+    # Only entering a square is deadly, so gold in a pit can still be taken if it is where the agent starts
+    if gold < 0 or (gold != 0 and gold in pits):
+        return Solution(NO_GOLD_SCORE, (CLIMB,))
+
+    forward, left, right = _move_tables(size)
+
+    # The squares the agent can enter, without and with the wumpus killed
+    open_squares = [True] * (size * size)
+    for pit in pits:
+        open_squares[pit] = False
+    open_squares_killed = list(open_squares)
+    if wumpus >= 0:
+        open_squares[wumpus] = False
+    firing_positions = _firing_positions(size, wumpus_x, wumpus_y) if wumpus >= 0 else ()
+
+    # A state is (position * 2 + has gold) * 2 + killed the wumpus, where a position is square * 4 + orientation
+    num_states = size * size * 16
+    costs = [num_states * SHOOT_COST] * num_states
+    parents = [None] * num_states
+    start = RIGHT * 4
+    costs[start] = 0
+    buckets = [[start]]
+    cost = 0
+
+    while cost < len(buckets):
+        for state in buckets[cost]:
+            if costs[state] < cost:
+                continue  # already reached more cheaply
+
+            flags = state & 3
+            position = state >> 2
+            if flags & 2 and position < 4:
+                actions = [CLIMB]
+                while state != start:
+                    state, action = parents[state]
+                    actions.append(action)
+                actions.reverse()
+                return Solution(1000 - cost - 1, tuple(actions))
+
+            moves = [(left[position] << 2 | flags, TURNLEFT, 1), (right[position] << 2 | flags, TURNRIGHT, 1)]
+            ahead = forward[position]
+            if ahead >= 0 and (open_squares_killed if flags & 1 else open_squares)[ahead >> 2]:
+                moves.append((ahead << 2 | flags, GOFORWARD, 1))
+            if not flags & 2 and position >> 2 == gold:
+                moves.append((state | 2, GRAB, 1))
+            if not flags & 1 and position in firing_positions:
+                moves.append((state | 1, SHOOT, SHOOT_COST))
+
+            for next_state, action, action_cost in moves:
+                next_cost = cost + action_cost
+                if costs[next_state] <= next_cost:
+                    continue
+                costs[next_state] = next_cost
+                parents[next_state] = (state, action)
+                while len(buckets) <= next_cost:
+                    buckets.append([])
+                buckets[next_cost].append(next_state)
+        cost += 1
+
+    return Solution(NO_GOLD_SCORE, (CLIMB,))
+
+
+_search_cached = functools.lru_cache(maxsize=CACHE_SIZE)(_search)
+
+
+def _neighbours(index, size):
+    """ _neighbours: return the squares next to the square """
+    x = index // size
+    y = index % size
+    return [next_index for next_index, inside in ((index + size, x + 1 < size), (index - size, x > 0),
+                                                  (index + 1, y + 1 < size), (index - 1, y > 0)) if inside]
+
+
+def _flood(reached, blocked, squares, size):
+    """ _flood: mark every square that can be walked to from the squares as reached, without entering a blocked one """
+    while squares:
+        for next_index in _neighbours(squares.pop(), size):
+            if not reached[next_index] and not blocked[next_index]:
+                reached[next_index] = 1
+                squares.append(next_index)
+
+
+def _is_solvable(key):
+    """ _is_solvable: return True if the gold can be brought out of the world with the layout key """
+    size, wumpus_x, wumpus_y, gold_x, gold_y, pits = key
+    if gold_x == 1 and gold_y == 1:
+        return True
+    if not (1 <= gold_x <= size and 1 <= gold_y <= size):
+        return False
+
+    gold = (gold_x - 1) * size + (gold_y - 1)
+    wumpus = (wumpus_x - 1) * size + (wumpus_y - 1) if 1 <= wumpus_x <= size and 1 <= wumpus_y <= size else -1
+
+    blocked = bytearray(size * size)
+    for pit in pits:
+        blocked[pit] = 1
+    if blocked[0] or blocked[gold]:
+        return False  # the agent can't come back into (1,1), or can't get into the gold's square
+    if wumpus >= 0:
+        blocked[wumpus] = 1
+
+    # The squares reachable with the wumpus alive, then (continuing the same flood fill) with it killed
+    reached = bytearray(size * size)
+    reached[0] = 1
+    _flood(reached, blocked, [0], size)
+    if reached[gold] and not blocked[0]:
+        return True
+    if wumpus < 0 or wumpus in pits:
+        return False
+
+    # The wumpus can be shot from any reached square in its row or column, facing it
+    if not any(reached[(x - 1) * size + (wumpus_y - 1)] for x in range(1, size + 1) if x != wumpus_x) and \
+            not any(reached[(wumpus_x - 1) * size + (y - 1)] for y in range(1, size + 1) if y != wumpus_y):
+        return False
+
+    blocked[wumpus] = 0
+    if wumpus == 0 or any(reached[index] for index in _neighbours(wumpus, size)):
+        reached[wumpus] = 1
+        _flood(reached, blocked, [wumpus], size)
+    return bool(reached[gold])
+
+
+_is_solvable_cached = functools.lru_cache(maxsize=CACHE_SIZE)(_is_solvable)
+
+
+def is_solvable(layout):
+    """ is_solvable: return True if the gold can be brought out of the world layout, much faster than solve """
+    return _is_solvable_cached(layout_key(layout))
+
+
+class SolvableWorlds(object):
+    """ SolvableWorlds: generates random worlds like State does, rejecting the ones where the gold can't be brought
+                        out, and counts the rejected candidates """
+
+    def __init__(self, world_size=None):
+        self.world_size = world_size  # the size of the worlds, WORLD_SIZE by default
+        self.num_worlds = 0
+        self.num_rejected = 0
+
+    def generate(self, trial_seed):
+        """ generate: return the first solvable random world layout drawn from the trial seed """
+        random.seed(trial_seed)
+        while True:
+            layout = Wumpsim.State(file_information=None, world_size=self.world_size).get_layout()
+            if is_solvable(layout):
+                self.num_worlds += 1
+                return layout
+            self.num_rejected += 1
+
+    def report(self):
+        """ report: return a line describing how many candidate worlds were rejected """
+        num_candidates = self.num_worlds + self.num_rejected
+        return "Solvable worlds: {} of {} candidates kept, {} rejected ({:.1f}%)".format(
+            self.num_worlds, num_candidates, self.num_rejected,
+            100.0 * self.num_rejected / num_candidates if num_candidates else 0.0)
+
+
+def solve(layout):
+    """ solve: return the Solution (best score and its actions) for a world layout, or a WumpusWorld """
+    if isinstance(layout, Wumpsim.WumpusWorld):
+        layout = layout.current_state.get_layout()
+    return _search_cached(layout_key(layout))
+
+
+def best_score(layout):
+    """ best_score: return the best score an agent could get in the world layout """
+    return solve(layout).score
+
+
+def _best_score_for_key(key):
+    return _search_cached(key).score
+
+
+def solve_corpus(layouts, workers=1, chunk_size=256):
+    """ solve_corpus: return the best score of every world layout, solving the repeated worlds once """
+    keys = [layout_key(layout) for layout in layouts]
+    if workers <= 1:
+        return [_best_score_for_key(key) for key in keys]
+
+    # Each distinct world is only sent to a worker once
+    import multiprocessing
+    distinct = list(dict.fromkeys(keys))
+    with multiprocessing.Pool(workers) as pool:
+        scores = dict(zip(distinct, pool.map(_best_score_for_key, distinct, chunksize=chunk_size)))
+    return [scores[key] for key in keys]
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-world', type=str)
+    parser.add_argument('-trials', type=int, default=1)
+    parser.add_argument('-seed', type=int)
+    parser.add_argument('-workers', type=int, default=1)
+    parser.add_argument('-output', type=str)
+    args = parser.parse_args()
+
+    if args.trials <= 0:
+        raise argparse.ArgumentTypeError("Minimum trials is 1")
+
+    if args.workers <= 0:
+        raise argparse.ArgumentTypeError("Minimum workers is 1")
+
+    if args.world is not None:
+        layouts = list(Wumpsim.load_worlds(args.world))
+        if not all(Wumpsim.has_one_wumpus_and_gold(layout) for layout in layouts):
+            raise argparse.ArgumentTypeError("Only worlds with one wumpus and one gold can be solved")
+    else:
+        seed = args.seed if args.seed is not None else random.SystemRandom().getrandbits(32)
+        print("Using seed {}".format(seed))
+        layouts = Wumpsim.get_world_set(seed, args.trials)
+
+    start = time.perf_counter()
+    scores = solve_corpus(layouts, workers=args.workers)
+    seconds = time.perf_counter() - start
+
+    num_solvable = sum(1 for score in scores if score > NO_GOLD_SCORE)
+    print("Worlds: {}, with the gold brought out: {} ({:.1f}%)".format(len(scores), num_solvable,
+                                                                      100.0 * num_solvable / len(scores)))
+    print("Best average score: {:.3f}".format(sum(scores) / len(scores)))
+    print("Solved in {:.2f} seconds ({:.0f} worlds/sec)".format(seconds, len(scores) / seconds if seconds else 0))
+
+    if args.output is not None:
+        with open(args.output, "w") as outfile:
+            json.dump(scores, outfile)
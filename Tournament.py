@@ -0,0 +1,228 @@
+#
+# Tournament.py evaluates many agents concurrently on the same seeded worlds, and ranks them
+#
+# https://github.com/erikphillips/wumpus_world
+#
+# Usage:
+#   python Tournament.py -agents PyAgent MyAgent pkg.agents:PlannerAgent [-trials TRIALS] [-tries TRIES]
+#                        [-seed SEED] [-world WORLD] [-concurrency N] [-timeout SECONDS] [-processes]
+#                        [-output FILE]
+#
+# An agent is either a module with the five PyAgent_ functions, or 'module:Class' for an agent class with the
+# same methods as Wumpsim.Agent. Every agent plays the same worlds, generated once from the seed. Each agent is
+# evaluated in its own daemon thread, or process with -processes, and its -timeout starts when it starts running.
+# An agent in a process that times out is killed. One in a thread can only be asked to stop between trials, so a
+# blocked thread is left behind, still using a CPU, but it does not keep the tournament from finishing. With
+# threads (the default) an agent that uses the random module is not reproducible, as the agents share it; use
+# -processes for that.
+#
+
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import threading
+import time
+import Wumpsim
+
+
+# The statuses of an agent's evaluation
+STATUS_OK = "ok"
+STATUS_TIMEOUT = "timeout"
+STATUS_ERROR = "error"
+
+
+def evaluate_agent(agent_spec, layouts, seed, tries, stop=None):
+    """ evaluate_agent: play every world with a fresh copy of the agent, returning the total score of each trial
+
+        The evaluation ends early, between trials, once the stop event is set. """
+    agent = Wumpsim.load_agent(agent_spec, fresh=True)
+    output = Wumpsim.Output(level=Wumpsim.OUTPUT_QUIET)
+    agent.set_output(output)
+    args = argparse.Namespace(tries=tries)
+
+    trial_scores = []
+    try:
+        for trial, layout in enumerate(layouts, 1):
+            if stop is not None and stop.is_set():
+                break
+            scores = Wumpsim.run_trial(trial, Wumpsim.get_trial_seed(seed, trial), layout, agent, args, output)
+            trial_scores.append(sum(scores))
+    finally:
+        agent.close()
+
+    return trial_scores
+
+
+def _describe_error(error):
+    """ _describe_error: return the message for an error raised while evaluating an agent, including an exit """
+    if isinstance(error, SystemExit):
+        return "the agent exited with status {}".format(error.code)
+    return "{}".format(error) or type(error).__name__
+
+
+def _evaluate_in_process(connection, agent_spec, layouts, seed, tries):
+    """ _evaluate_in_process: evaluate the agent in a child process, sending back (True, trial scores) or
+                              (False, the error) """
+    try:
+        connection.send((True, evaluate_agent(agent_spec, layouts, seed, tries)))
+    except (Exception, SystemExit) as error:
+        connection.send((False, _describe_error(error)))
+    finally:
+        connection.close()
+
+
+def _receive(connection):
+    """ _receive: return the (ok, result) sent by _evaluate_in_process, raising the error it sent """
+    try:
+        ok, result = connection.recv()
+    except EOFError:
+        raise RuntimeError("the agent's process ended without a result")
+    if not ok:
+        raise RuntimeError(result)
+    return result
+
+
+def _run_in_daemon_thread(loop, function, *args):
+    """ _run_in_daemon_thread: call the function in a new daemon thread, returning a future for its result
+
+        A daemon thread that never returns is abandoned once the tournament is over, so it can't keep the
+        simulator from exiting. """
+    future = loop.create_future()
+
+    def settle(ok, value):
+        if not future.done():
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def run():
+        try:
+            result = (True, function(*args))
+        except BaseException as error:
+            result = (False, error)
+        try:
+            loop.call_soon_threadsafe(settle, *result)
+        except RuntimeError:
+            pass  # the tournament is over and its loop is closed
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+async def _run_agent(agent_spec, layouts, seed, tries, semaphore, timeout, use_processes):
+    """ _run_agent: evaluate one agent once there is room, returning its leaderboard entry
+
+        The agent's timeout starts when it starts running. On a timeout, an agent in a process is killed, and an
+        agent in a thread is asked to stop between trials and left behind if it is blocked. """
+    async with semaphore:
+        loop = asyncio.get_running_loop()
+
+        entry = {"agent": agent_spec, "status": STATUS_OK, "trials": 0, "average_score": None,
+                 "total_score": None, "seconds": 0.0}
+        start = time.perf_counter()
+
+        stop = None
+        process = None
+        if use_processes:
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=_evaluate_in_process,
+                                              args=(sender, agent_spec, layouts, seed, tries), daemon=True)
+            process.start()
+            sender.close()
+            future = _run_in_daemon_thread(loop, _receive, receiver)
+        else:
+            stop = threading.Event()
+            future = _run_in_daemon_thread(loop, evaluate_agent, agent_spec, layouts, seed, tries, stop)
+
+        try:
+            trial_scores = await asyncio.wait_for(future, timeout)
+            entry["trials"] = len(trial_scores)
+            entry["total_score"] = sum(trial_scores)
+            entry["average_score"] = sum(trial_scores) / (len(trial_scores) * tries) if trial_scores else None
+        except asyncio.TimeoutError:
+            if stop is not None:
+                stop.set()
+            entry["status"] = STATUS_TIMEOUT
+        except (Exception, SystemExit) as error:
+            entry["status"] = "{}: {}".format(STATUS_ERROR, _describe_error(error))
+        finally:
+            if process is not None:
+                if process.is_alive():
+                    process.kill()
+                process.join()
+
+        entry["seconds"] = time.perf_counter() - start
+        return entry
+
+
+async def run_tournament(agent_specs, trials=1, tries=1, seed=None, world=None, concurrency=4, timeout=None,
+                         use_processes=False):
+    """ run_tournament: evaluate every agent on the same worlds, at most concurrency at a time, returning the
+                        leaderboard entries ranked by average score """
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(32)
+
+    layouts = Wumpsim.get_world_set(seed, trials, world)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    entries = await asyncio.gather(*[_run_agent(agent_spec, layouts, seed, tries, semaphore, timeout, use_processes)
+                                     for agent_spec in agent_specs])
+
+    # Rank the agents that finished by their average score, the rest go to the bottom in the order given
+    finished = sorted([entry for entry in entries if entry["status"] == STATUS_OK and entry["trials"] > 0],
+                      key=lambda entry: entry["average_score"], reverse=True)
+    unfinished = [entry for entry in entries if entry not in finished]
+
+    leaderboard = finished + unfinished
+    for rank, entry in enumerate(leaderboard, 1):
+        entry["rank"] = rank
+
+    return leaderboard
+
+
+def format_leaderboard(leaderboard):
+    """ format_leaderboard: return the leaderboard as a text table """
+    lines = ["{:>4}  {:<32} {:>14} {:>8} {:>10}  {}".format("Rank", "Agent", "Average score", "Trials", "Seconds",
+                                                          "Status")]
+    for entry in leaderboard:
+        average = "-" if entry["average_score"] is None else "{:.3f}".format(entry["average_score"])
+        lines.append("{:>4}  {:<32} {:>14} {:>8} {:>10.2f}  {}".format(entry["rank"], entry["agent"], average,
+                                                                     entry["trials"], entry["seconds"],
+                                                                     entry["status"]))
+    return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-agents', type=str, nargs='+', required=True)
+    parser.add_argument('-trials', type=int, default=1)
+    parser.add_argument('-tries', type=int, default=1)
+    parser.add_argument('-seed', type=int)
+    parser.add_argument('-world', type=str)
+    parser.add_argument('-concurrency', type=int, default=4)
+    parser.add_argument('-timeout', type=float)
+    parser.add_argument('-processes', action='store_true')
+    parser.add_argument('-output', type=str)
+    args = parser.parse_args()
+
+    if args.tries <= 0:
+        raise argparse.ArgumentTypeError("Minimum tries is 1")
+
+    if args.trials <= 0:
+        raise argparse.ArgumentTypeError("Minimum trials is 1")
+
+    if args.concurrency <= 0:
+        raise argparse.ArgumentTypeError("Minimum concurrency is 1")
+
+    leaderboard = asyncio.run(run_tournament(args.agents, trials=args.trials, tries=args.tries, seed=args.seed,
+                                             world=args.world, concurrency=args.concurrency, timeout=args.timeout,
+                                             use_processes=args.processes))
+    print(format_leaderboard(leaderboard))
+
+    if args.output is not None:
+        with open(args.output, "w") as outfile:
+            json.dump(leaderboard, outfile, indent=2)
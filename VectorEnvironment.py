@@ -0,0 +1,92 @@
+#
+# VectorEnvironment.py many reinforcement learning environments stepped at once, over a BatchWumpusWorld
+#
+# https://github.com/erikphillips/wumpus_world
+#
+# Usage:
+#   env = VectorEnvironment(1024, world_size=4)
+#   observations = env.reset(seed=1)
+#   observations, rewards, terminated, truncated = env.step(actions)
+#
+# The observations, rewards, terminated and truncated arrays are allocated once, and every step writes into them,
+# so a caller that keeps them must copy them; a step allocates no arrays. Each environment is the same as a
+# WumpusEnvironment: observations are percept bits and rewards are changes in the score. An environment whose
+# episode ends starts its next episode (a new try of its world) at once, so its observation is the first of the new
+# episode. reset draws new worlds.
+#
+
+
+import numpy as np
+from BatchWumpusWorld import BatchWumpusWorld
+import Wumpsim
+
+
+class VectorEnvironment(object):
+    """ VectorEnvironment: num_envs wumpus worlds stepped together, writing into preallocated arrays """
+
+    def __init__(self, num_envs, world_size=None, worlds=None, max_moves=Wumpsim.MAX_MOVES_PER_GAME):
+        """ __init__: create num_envs environments with generated worlds, or cycling through the worlds (a list of
+                      layouts, or a path for Wumpsim.load_worlds) """
+        if isinstance(worlds, str):
+            worlds = Wumpsim.load_worlds(worlds)
+        self.num_envs = num_envs
+        self.world_size = world_size
+        self.worlds = worlds
+        self.max_moves = max_moves
+        self.num_resets = 0
+        self.batch = None
+
+        self.observations = np.zeros(num_envs, dtype=np.uint8)
+        self.rewards = np.zeros(num_envs, dtype=np.int64)
+        self.terminated = np.zeros(num_envs, dtype=bool)
+        self.truncated = np.zeros(num_envs, dtype=bool)
+        self.episode_scores = np.zeros(num_envs, dtype=np.int64)  # the final score of each environment's last episode
+
+        self._scores = np.zeros(num_envs, dtype=np.int64)
+        self._new_scores = np.zeros(num_envs, dtype=np.int64)
+        self._done = np.zeros(num_envs, dtype=bool)
+        self._weights = np.array([1 << column for column in range(5)], dtype=np.uint8)  # percept columns to bits
+        self._bits = np.zeros((num_envs, 5), dtype=np.uint8)
+
+    def reset(self, seed=None):
+        """ reset: start a new episode in every environment, with new worlds, returning the observations """
+        if self.worlds is not None:
+            start = self.num_resets * self.num_envs
+            layouts = [self.worlds[(start + index) % len(self.worlds)] for index in range(self.num_envs)]
+            self.batch = BatchWumpusWorld(layouts)
+        else:
+            self.batch = BatchWumpusWorld.generate(self.num_envs, world_size=self.world_size, seed=seed)
+
+        self.num_resets += 1
+        self._scores.fill(0)
+        self._observe()
+        return self.observations
+
+    def _observe(self):
+        """ _observe: pack the percept matrix into the observation bits """
+        np.multiply(self.batch.percepts.view(np.uint8), self._weights, out=self._bits)  # a view, so nothing is cast
+        np.sum(self._bits, axis=1, dtype=np.uint8, out=self.observations)
+
+    def step(self, actions):
+        """ step: take an action in every environment, returning the (observations, rewards, terminated, truncated)
+                  arrays, which are overwritten by the next step """
+        batch = self.batch
+        batch.execute_actions(actions)
+
+        scores = batch.get_scores(out=self._new_scores)
+        np.subtract(scores, self._scores, out=self.rewards)
+        np.copyto(self._scores, scores)
+
+        batch.game_over(out=self.terminated)
+        np.greater_equal(batch.num_actions, self.max_moves, out=self.truncated)
+        self.truncated &= np.logical_not(self.terminated, out=self._done)
+
+        # Start the next episode of every environment that finished
+        np.logical_or(self.terminated, self.truncated, out=self._done)
+        if self._done.any():
+            np.copyto(self.episode_scores, scores, where=self._done)
+            batch.initialize(self._done)
+            np.copyto(self._scores, 0, where=self._done)
+
+        self._observe()
+        return self.observations, self.rewards, self.terminated, self.truncated
@@ -0,0 +1,84 @@
+#
+# WorldGenerator.py bulk random world generation for large caves and large batches of worlds
+#
+# https://github.com/erikphillips/wumpus_world
+#
+# The pits of a chunk of worlds are drawn as one array of NumPy randoms, and kept as a bitmap per world.
+#
+
+
+import numpy as np
+import Wumpsim
+
+
+# The most random numbers drawn at once when generating a batch of worlds
+MAX_CELLS_PER_DRAW = 1 << 22
+
+
+class GeneratedWorld(object):
+    """ GeneratedWorld: a world layout with the pits held as a bitmap
+
+        The bitmap is indexed [x - 1, y - 1]. A generated world can be given to WumpusWorld as its file_information,
+        the list of pit locations is only built when it is first needed. """
+
+    def __init__(self, world_size, wumpus_location, gold_location, pit_bitmap):
+        self.world_size = world_size
+        self.wumpus_location = wumpus_location
+        self.gold_location = gold_location
+        self.pit_bitmap = pit_bitmap
+        self._pit_locations = None
+
+    @property
+    def pit_indices(self):
+        """ pit_indices: the sorted pit locations packed as Location.to_index integers """
+        return np.flatnonzero(self.pit_bitmap)
+
+    @property
+    def pit_locations(self):
+        """ pit_locations: the list of pit locations, built from the bitmap the first time it is used """
+        if self._pit_locations is None:
+            self._pit_locations = [Wumpsim.Location.from_index(int(index), self.world_size)
+                                   for index in self.pit_indices]
+        return self._pit_locations
+
+
+def generate_pit_bitmaps(count, world_size, rng):
+    """ generate_pit_bitmaps: return a (count, world_size, world_size) bitmap of pits, with no pit at (1,1)
+
+        Each square other than (1,1) holds a pit with PIT_PROBABILITY, the same as State._get_pit_locations. """
+    pits = rng.random((count, world_size, world_size), dtype=np.float32) < Wumpsim.PIT_PROBABILITY
+    pits[:, 0, 0] = False
+    return pits
+
+
+def generate_locations(count, world_size, rng):
+    """ generate_locations: return (x, y) arrays of count random locations, none of them (1,1) """
+    # Index 0 is the (1,1) square, so drawing from the other indices needs no rejection
+    indices = rng.integers(1, world_size * world_size, size=count)
+    return indices // world_size + 1, indices % world_size + 1
+
+
+def generate_worlds(count, world_size=None, seed=None):
+    """ generate_worlds: return a list of count randomly generated worlds, drawn from a NumPy RNG with the seed """
+    if world_size is None:
+        world_size = Wumpsim.WORLD_SIZE
+
+    rng = np.random.default_rng(seed)
+    worlds = []
+
+    # Draw the pits for a chunk of worlds at a time, so a large batch does not need all of its randoms at once
+    chunk_size = max(1, MAX_CELLS_PER_DRAW // (world_size * world_size))
+
+    for start in range(0, count, chunk_size):
+        chunk = min(chunk_size, count - start)
+        wumpus_x, wumpus_y = generate_locations(chunk, world_size, rng)
+        gold_x, gold_y = generate_locations(chunk, world_size, rng)
+        pits = generate_pit_bitmaps(chunk, world_size, rng)
+
+        for index in range(chunk):
+            worlds.append(GeneratedWorld(world_size,
+                                         Wumpsim.Location(int(wumpus_x[index]), int(wumpus_y[index])),
+                                         Wumpsim.Location(int(gold_x[index]), int(gold_y[index])),
+                                         pits[index]))
+
+    return worlds
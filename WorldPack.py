@@ -0,0 +1,201 @@
+#
+# WorldPack.py a binary format holding many worlds in one file, loaded with a memory map
+#
+# https://github.com/erikphillips/wumpus_world
+#
+# Usage:
+#   python WorldPack.py -pack PACK WORLD [WORLD ...]   # WORLD is a world file or a directory of world files
+#   python WorldPack.py -unpack PACK -index N          # print world N in the world file format
+#
+# Pack format (little-endian):
+#   header:  magic "WPAK", version (u16), reserved (u16), world count (u32), offset table position (u64)
+#   records: world size, wumpus x, wumpus y, gold x, gold y (u16 each), pit encoding (u8), pad (u8),
+#            pit count (u32), then the pits as u32 Location.to_index values or as a bitmap of size * size bits
+#   table:   the offset of each record (u64), then the offset of the end of the last record
+#
+
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import Wumpsim
+
+
+WORLD_PACK_MAGIC = b"WPAK"
+WORLD_PACK_VERSION = 1
+
+# How the pits of a record are stored, whichever is smaller is used
+PIT_ENCODING_INDICES = 0
+PIT_ENCODING_BITMAP = 1
+
+_HEADER = struct.Struct("<4sHHIQ")
+_RECORD = struct.Struct("<HHHHHBxI")
+_OFFSET = struct.Struct("<Q")
+_INDEX = struct.Struct("<I")
+
+# The set bits of every byte value, so a pit bitmap is decoded a byte at a time, skipping the bytes with no pits
+_BYTE_BITS = [tuple(bit for bit in range(8) if value & (1 << bit)) for value in range(256)]
+
+
+def _encode_world(layout):
+    """ _encode_world: return the bytes of the record for the world layout """
+    size = layout.world_size
+    indices = sorted(set(pit.to_index(size) for pit in layout.pit_locations))
+
+    if not Wumpsim.has_one_wumpus_and_gold(layout):
+        print("A world pack only holds worlds with one wumpus and one gold, the world can't be packed.")
+        sys.exit(1)
+
+    for location in [layout.wumpus_location, layout.gold_location] + list(layout.pit_locations):
+        if not (1 <= location.x <= size and 1 <= location.y <= size):
+            print("Location ({}, {}) is outside of the {}x{} world, it can't be packed.".format(location.x,
+                                                                                                location.y,
+                                                                                                size, size))
+            sys.exit(1)
+
+    bitmap_length = (size * size + 7) // 8
+    if len(indices) * _INDEX.size <= bitmap_length:
+        header = _RECORD.pack(size, layout.wumpus_location.x, layout.wumpus_location.y,
+                              layout.gold_location.x, layout.gold_location.y, PIT_ENCODING_INDICES, len(indices))
+        return header + struct.pack("<{}I".format(len(indices)), *indices)
+
+    bitmap = bytearray(bitmap_length)
+    for index in indices:
+        bitmap[index >> 3] |= 1 << (index & 7)
+
+    header = _RECORD.pack(size, layout.wumpus_location.x, layout.wumpus_location.y,
+                          layout.gold_location.x, layout.gold_location.y, PIT_ENCODING_BITMAP, len(indices))
+    return header + bytes(bitmap)
+
+
+def write_pack(filename, layouts):
+    """ write_pack: write the world layouts (any iterable, read once) to a world pack, returning the world count
+
+        The pack is written to a temporary file that then replaces the file, so a world that can't be packed leaves
+        no partly written pack behind. """
+    offsets = []
+
+    handle, temporary = tempfile.mkstemp(prefix=".worldpack-", dir=os.path.dirname(os.path.abspath(filename)))
+    try:
+        with os.fdopen(handle, "wb") as outfile:
+            outfile.write(_HEADER.pack(WORLD_PACK_MAGIC, WORLD_PACK_VERSION, 0, 0, 0))
+
+            position = _HEADER.size
+            for layout in layouts:
+                record = _encode_world(layout)
+                offsets.append(position)
+                outfile.write(record)
+                position += len(record)
+            offsets.append(position)
+
+            for offset in offsets:
+                outfile.write(_OFFSET.pack(offset))
+
+            # Now that every record is written, fill in the world count and where the offset table is
+            outfile.seek(0)
+            outfile.write(_HEADER.pack(WORLD_PACK_MAGIC, WORLD_PACK_VERSION, 0, len(offsets) - 1, position))
+        os.replace(temporary, filename)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+    return len(offsets) - 1
+
+
+class WorldPack(object):
+    """ WorldPack: a memory mapped world pack, where each world is only decoded when it is asked for """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, self.num_worlds, self._table_offset = _HEADER.unpack_from(self._map, 0)
+        if magic != WORLD_PACK_MAGIC or version != WORLD_PACK_VERSION:
+            print("Invalid world pack '{}', expected version {}.".format(filename, WORLD_PACK_VERSION))
+            sys.exit(1)
+
+    def __len__(self):
+        return self.num_worlds
+
+    def __getitem__(self, index):
+        """ __getitem__: decode and return the layout of world number index (from 0) """
+        if index < 0:
+            index += self.num_worlds
+        if not 0 <= index < self.num_worlds:
+            raise IndexError("world pack index out of range")
+
+        offset = _OFFSET.unpack_from(self._map, self._table_offset + index * _OFFSET.size)[0]
+        size, wumpus_x, wumpus_y, gold_x, gold_y, encoding, num_pits = _RECORD.unpack_from(self._map, offset)
+        offset += _RECORD.size
+
+        if encoding == PIT_ENCODING_INDICES:
+            indices = struct.unpack_from("<{}I".format(num_pits), self._map, offset)
+        else:
+            bitmap = self._map[offset:offset + (size * size + 7) // 8]
+            indices = [(base << 3) + bit for base, value in enumerate(bitmap) if value for bit in _BYTE_BITS[value]]
+
+        return Wumpsim.WorldLayout(size, Wumpsim.Location(wumpus_x, wumpus_y), Wumpsim.Location(gold_x, gold_y),
+                                   [Wumpsim.Location.from_index(index, size) for index in indices])
+
+    def __iter__(self):
+        for index in range(self.num_worlds):
+            yield self[index]
+
+    def close(self):
+        """ close: unmap and close the world pack """
+        self._map.close()
+        self._file.close()
+
+
+def list_world_files(paths):
+    """ list_world_files: return the world files in the paths, expanding each directory to its sorted files """
+    filenames = []
+    for path in paths:
+        filenames.extend(Wumpsim.list_world_files(path))
+    return filenames
+
+
+def read_world_files(filenames):
+    """ read_world_files: generate the layout of each world file, parsing one file at a time """
+    for filename in filenames:
+        yield Wumpsim.read_world_file(filename)
+
+
+def format_world(layout):
+    """ format_world: return the layout in the text world file format """
+    lines = ["size {}".format(layout.world_size),
+             "wumpus {} {}".format(layout.wumpus_location.x, layout.wumpus_location.y),
+             "gold {} {}".format(layout.gold_location.x, layout.gold_location.y)]
+    for pit in layout.pit_locations:
+        lines.append("pit {} {}".format(pit.x, pit.y))
+    for wumpus in Wumpsim.layout_wumpuses(layout)[1:]:
+        lines.append("wumpus {} {}".format(wumpus.x, wumpus.y))
+    for gold in Wumpsim.layout_golds(layout)[1:]:
+        lines.append("gold {} {}".format(gold.x, gold.y))
+    return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    mode_group = parser.add_mutually_exclusive_group(required=True)
+    mode_group.add_argument('-pack', type=str)
+    mode_group.add_argument('-unpack', type=str)
+    parser.add_argument('-index', type=int, default=0)
+    parser.add_argument('worlds', nargs='*')
+    args = parser.parse_args()
+
+    if args.pack is not None:
+        if not args.worlds:
+            raise argparse.ArgumentTypeError("At least one world file or directory is required to pack")
+
+        count = write_pack(args.pack, read_world_files(list_world_files(args.worlds)))
+        print("Packed {} worlds into '{}'.".format(count, args.pack))
+    else:
+        world_pack = WorldPack(args.unpack)
+        print(format_world(world_pack[args.index]))
+        world_pack.close()
@@ -15,25 +15,65 @@
 
 from Action import *
 from Orientation import *
-import PyAgent
+import collections
+import os
 import random
 import sys
 
 
+# Everything else (argparse, importlib, the agent and the optional modules) is imported when it is first used,
+# so importing the simulator, or starting a short run, stays fast
+
 # The version of the wumpus simulator
 WUMPSIM_VERSION = "v1.2"
 
-# The size of the world, which will be a square
+# The size of a random world, which will be a square, unless another size is given for the world
 WORLD_SIZE = 4
 
 # The probability that a pit will be at any given location
 PIT_PROBABILITY = 0.2
 
+# The agent module used when no other agent is given
+DEFAULT_AGENT = "PyAgent"
+
 # The maximum number of moves per game
 MAX_MOVES_PER_GAME = 1000
 
+# The extension of the world files read from a directory of worlds
+WORLD_FILE_EXTENSION = ".txt"
+
+# The seconds between the checkpoints of a run (-checkpoint), unless another interval is given
+CHECKPOINT_INTERVAL = 5.0
+
+# The output levels of the simulator
+OUTPUT_QUIET = 0    # nothing is written
+OUTPUT_SUMMARY = 1  # only the try, trial and final scores are written
+OUTPUT_VERBOSE = 2  # the world, percepts and action are written at every step
+
+# The flags of each square in the percept grid of a wumpus world
+CELL_STENCH = 1   # the square is at or next to the wumpus
+CELL_BREEZE = 2   # the square is next to a pit
+CELL_GLITTER = 4  # the gold has not been grabbed from the square
+CELL_PIT = 8      # the square holds a pit
+CELL_DEADLY = 16  # entering the square kills the agent (a pit or the live wumpus)
+
+# The escape sequences used to redraw the world in place on a terminal
+ANSI_CLEAR_SCREEN = "\x1b[H\x1b[2J"
+ANSI_MOVE_TO_LINE = "\x1b[{};1H"
+ANSI_CLEAR_LINE = "\x1b[K"
+ANSI_CLEAR_BELOW = "\x1b[J"
+
+# The bits of a percept packed into an integer by Percept.to_bits
+PERCEPT_BIT_STENCH = 1
+PERCEPT_BIT_BREEZE = 2
+PERCEPT_BIT_GLITTER = 4
+PERCEPT_BIT_BUMP = 8
+PERCEPT_BIT_SCREAM = 16
+
 
 class Percept(object):
+    __slots__ = ("stench", "breeze", "glitter", "bump", "scream")
+
     def __init__(self):
         """ __init__: create a new percept"""
         self.stench = False
@@ -50,30 +90,61 @@ class Percept(object):
         self.bump = False
         self.scream = False
 
+    def to_bits(self):
+        """ to_bits: return the percepts packed into a 5-bit integer of PERCEPT_BIT_ flags """
+        return ((PERCEPT_BIT_STENCH if self.stench else 0) |
+                (PERCEPT_BIT_BREEZE if self.breeze else 0) |
+                (PERCEPT_BIT_GLITTER if self.glitter else 0) |
+                (PERCEPT_BIT_BUMP if self.bump else 0) |
+                (PERCEPT_BIT_SCREAM if self.scream else 0))
+
+    @staticmethod
+    def from_bits(bits):
+        """ from_bits: return a new percept from a 5-bit integer of PERCEPT_BIT_ flags """
+        percept = Percept()
+        percept.stench = (bits & PERCEPT_BIT_STENCH) != 0
+        percept.breeze = (bits & PERCEPT_BIT_BREEZE) != 0
+        percept.glitter = (bits & PERCEPT_BIT_GLITTER) != 0
+        percept.bump = (bits & PERCEPT_BIT_BUMP) != 0
+        percept.scream = (bits & PERCEPT_BIT_SCREAM) != 0
+        return percept
+
 
 class State(object):
-    """ State: holds the information on the current state of the game """
+    """ State: holds the information on the current state of the game
+
+        A world may have several wumpuses and pieces of gold. wumpus_location and gold_location are the first of
+        each, the only ones in a classic world. The agent has one arrow, so at most one wumpus (killed_wumpus, by
+        its number in wumpus_locations) dies in a try, and golds_grabbed has a bit for each gold the agent holds. """
+
+    __slots__ = ("world_size", "wumpus_location", "gold_location", "pit_locations", "wumpus_locations",
+                 "gold_locations", "agent_location", "agent_orientation", "agent_alive", "agent_has_arrow",
+                 "agent_has_gold", "agent_in_cave", "wumpus_alive", "killed_wumpus", "golds_grabbed")
 
-    def __init__(self, file_information):
-        """ __init__: create a new state for the wumpus world, setting locations for wumpus, pits, and gold """
+    def __init__(self, file_information, world_size=None, num_wumpuses=1, num_golds=1):
+        """ __init__: create a new state for the wumpus world, setting locations for wumpus, pits, and gold
+
+            Without file information, the world is generated randomly with the given size (WORLD_SIZE by default)
+            and numbers of wumpuses and golds. """
 
         # If there is file information, then use that, otherwise setup randomly
         if file_information is None:
-            self.wumpus_location = self._get_wumpus_location()
-            self.gold_location = self._get_gold_location()
+            self.world_size = world_size if world_size is not None else WORLD_SIZE
+            self.wumpus_locations = [self._get_wumpus_location()]
+            self.gold_locations = [self._get_gold_location()]
             self.pit_locations = self._get_pit_locations()
+            self._add_random_locations(self.wumpus_locations, num_wumpuses)
+            self._add_random_locations(self.gold_locations, num_golds)
         else:
-            self.wumpus_location = file_information.wumpus_location
-            self.gold_location = file_information.gold_location
+            self.world_size = file_information.world_size
+            self.wumpus_locations = layout_wumpuses(file_information)
+            self.gold_locations = layout_golds(file_information)
             self.pit_locations = file_information.pit_locations
 
-        self.agent_location = Location(1, 1)
-        self.agent_orientation = RIGHT
-        self.agent_alive = True
-        self.agent_has_arrow = True
-        self.agent_has_gold = False
-        self.agent_in_cave = True
-        self.wumpus_alive = True
+        self.wumpus_location = self.wumpus_locations[0]
+        self.gold_location = self.gold_locations[0]
+
+        self.initialize()
 
     def initialize(self):
         """ initialize: called at the start of a new try, to reset game aspects back to default """
@@ -84,6 +155,13 @@ class State(object):
         self.agent_has_gold = False
         self.agent_in_cave = True
         self.wumpus_alive = True
+        self.killed_wumpus = None
+        self.golds_grabbed = 0
+
+    def get_layout(self):
+        """ get_layout: return the fixed layout of the world as a WorldLayout """
+        return WorldLayout(self.world_size, self.wumpus_location, self.gold_location, self.pit_locations,
+                           self.wumpus_locations, self.gold_locations)
 
     def _get_gold_location(self):
         """ _get_gold_location: return a random location not (1,1) for the gold's location """
@@ -95,24 +173,31 @@ class State(object):
         x, y = self._get_random_location()
         return Location(x, y)
 
-    @staticmethod
-    def _get_random_location():
+    def _add_random_locations(self, locations, count):
+        """ _add_random_locations: add random locations, not (1,1) or already in the list, until there are count """
+        taken = set(locations)
+        while len(locations) < count:
+            location = Location(*self._get_random_location())
+            if location not in taken:
+                taken.add(location)
+                locations.append(location)
+
+    def _get_random_location(self):
         """ _get_random_location: return a random location that is not the (1,1) square """
         x = 1
         y = 1
 
         while (x == 1) and (y == 1):
-            x = random.randint(1, WORLD_SIZE)
-            y = random.randint(1, WORLD_SIZE)
+            x = random.randint(1, self.world_size)
+            y = random.randint(1, self.world_size)
 
         return x, y
 
-    @staticmethod
-    def _get_pit_locations():
+    def _get_pit_locations(self):
         """ _get_pit_locations: returns an array of pit locations, randomly selected based on a probability """
         locations = []
-        for x in range(1, WORLD_SIZE + 1):
-            for y in range(1, WORLD_SIZE + 1):
+        for x in range(1, self.world_size + 1):
+            for y in range(1, self.world_size + 1):
                 if (x != 1) or (y != 1):
                     # Using the PIT_PROBABILITY, randomly determine if a pit will be at this location
                     if (random.randint(0, 1000 - 1)) < (PIT_PROBABILITY * 1000):
@@ -120,8 +205,27 @@ class State(object):
         return locations
 
 
+def layout_wumpuses(layout):
+    """ layout_wumpuses: return the location of every wumpus of a layout, which may only have a wumpus_location """
+    return list(getattr(layout, "wumpus_locations", None) or [layout.wumpus_location])
+
+
+def layout_golds(layout):
+    """ layout_golds: return the location of every gold of a layout, which may only have a gold_location """
+    return list(getattr(layout, "gold_locations", None) or [layout.gold_location])
+
+
+def has_one_wumpus_and_gold(layout):
+    """ has_one_wumpus_and_gold: return True if the layout has a single wumpus and a single gold """
+    return len(layout_wumpuses(layout)) == 1 and len(layout_golds(layout)) == 1
+
+
 class Location(object):
-    """ Location: location object that holds an x, y coordinate in the map """
+    """ Location: location object that holds an x, y coordinate in the map
+
+        Locations hash by their coordinates, so a location must not be changed while it is in a set or dict. """
+
+    __slots__ = ("x", "y")
 
     def __init__(self, x=0, y=0):
         self.x = x
@@ -130,6 +234,24 @@ class Location(object):
     def __eq__(self, other):
         return self.x == other.x and self.y == other.y
 
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+    def __repr__(self):
+        return "Location({}, {})".format(self.x, self.y)
+
+    def to_index(self, world_size):
+        """ to_index: return the location packed into a single integer for a world of the given size """
+        return (self.x - 1) * world_size + (self.y - 1)
+
+    @staticmethod
+    def from_index(index, world_size):
+        """ from_index: return a new location from an integer made by to_index """
+        return Location(index // world_size + 1, index % world_size + 1)
+
     @staticmethod
     def adjacent(location1, location2):
         """ adjacent: returns true if the two locations and next to each other """
@@ -148,27 +270,83 @@ class Location(object):
         return False
 
 
+# The parts of a wumpus world that change during a try, as an immutable value (the layout is kept by the world)
+WorldState = collections.namedtuple("WorldState", ["num_actions", "x", "y", "orientation", "agent_alive",
+                                                   "agent_has_arrow", "agent_has_gold", "agent_in_cave",
+                                                   "wumpus_alive", "percept", "killed_wumpus", "golds_grabbed"])
+
+# The move of GOFORWARD, and the orientation after TURNLEFT and TURNRIGHT, for each orientation
+FORWARD_MOVES = {RIGHT: (1, 0), UP: (0, 1), LEFT: (-1, 0), DOWN: (0, -1)}
+LEFT_TURNS = {RIGHT: UP, UP: LEFT, LEFT: DOWN, DOWN: RIGHT}
+RIGHT_TURNS = {RIGHT: DOWN, UP: RIGHT, LEFT: UP, DOWN: LEFT}
+
+
+def _count_golds(golds_grabbed):
+    """ _count_golds: return the number of golds grabbed, from the bits of golds_grabbed """
+    return bin(golds_grabbed).count("1")
+
+
 class WumpusWorld(object):
-    def __init__(self, file_information=None):
-        """ __init__: create a new wumpus world, randomly placing the wumpus and the gold, and multiple pits """
+    def __init__(self, file_information=None, world_size=None, num_wumpuses=1, num_golds=1):
+        """ __init__: create a new wumpus world, randomly placing the wumpus and the gold, and multiple pits
+
+            The size and the numbers of wumpuses and golds are only used for a random world. """
         self.num_actions = 0
 
         # Update the current state
-        self.current_state = State(file_information=file_information)
+        self.current_state = State(file_information=file_information, world_size=world_size,
+                                   num_wumpuses=num_wumpuses, num_golds=num_golds)
+
+        # Build the percepts for every square once, so each move only needs to look up its square
+        self.world_size = self.current_state.world_size
+        self.percept_grid = None
+        self.wumpus_index = None
+        self.gold_index = None
+        self._build_percept_grid()
+        self.renderer = None  # built by the first print_world
 
         # Update current percepts
         self.current_percept = Percept()
+        self._update_location_percepts()
 
-        if Location.adjacent(self.current_state.agent_location, self.current_state.wumpus_location) or \
-           (self.current_state.agent_location == self.current_state.wumpus_location):
-            self.current_percept.stench = True
+    def _build_percept_grid(self):
+        """ _build_percept_grid: build the grid of CELL_ flags for every square, indexed by [x][y], and the number
+                                 of the wumpus and the gold on each square, indexed by (x, y) """
+        self.percept_grid = [[0] * (self.world_size + 1) for _ in range(self.world_size + 1)]
+        self.wumpus_index = {}
+        self.gold_index = {}
 
-        for pit in self.current_state.pit_locations:
-            if Location.adjacent(self.current_state.agent_location, pit):
-                self.current_percept.breeze = True
+        for number, wumpus in enumerate(self.current_state.wumpus_locations):
+            self.wumpus_index[(wumpus.x, wumpus.y)] = number
+            self._mark_square(wumpus.x, wumpus.y, CELL_STENCH | CELL_DEADLY)
+            self._mark_adjacent(wumpus, CELL_STENCH)
+
+        for number, gold in enumerate(self.current_state.gold_locations):
+            self.gold_index[(gold.x, gold.y)] = number
+            self._mark_square(gold.x, gold.y, CELL_GLITTER)
 
-        if self.current_state.gold_location.x == 1 and self.current_state.gold_location.y == 1:
-            self.current_percept.glitter = True
+        for pit in self.current_state.pit_locations:
+            self._mark_square(pit.x, pit.y, CELL_PIT | CELL_DEADLY)
+            self._mark_adjacent(pit, CELL_BREEZE)
+
+    def _mark_square(self, x, y, flags):
+        """ _mark_square: set the flags on the square at (x, y), if it is in the world """
+        if 1 <= x <= self.world_size and 1 <= y <= self.world_size:
+            self.percept_grid[x][y] |= flags
+
+    def _mark_adjacent(self, location, flags):
+        """ _mark_adjacent: set the flags on each of the squares next to the location """
+        for x, y in ((location.x + 1, location.y), (location.x - 1, location.y),
+                     (location.x, location.y + 1), (location.x, location.y - 1)):
+            self._mark_square(x, y, flags)
+
+    def _update_location_percepts(self):
+        """ _update_location_percepts: update the stench, breeze and glitter percepts for the agent's location """
+        cell = self.percept_grid[self.current_state.agent_location.x][self.current_state.agent_location.y]
+        self.current_percept.stench = (cell & CELL_STENCH) != 0
+        self.current_percept.breeze = (cell & CELL_BREEZE) != 0
+        self.current_percept.glitter = (cell & CELL_GLITTER) != 0
+        return cell
 
     def initialize(self):
         """ initialize: called at the start of a new try, resets certain aspects to default """
@@ -177,16 +355,159 @@ class WumpusWorld(object):
         self.current_state.initialize()
         self.current_percept.initialize()
 
-        if Location.adjacent(self.current_state.agent_location, self.current_state.wumpus_location) or \
-           (self.current_state.agent_location == self.current_state.wumpus_location):
-            self.current_percept.stench = True
+        # The wumpus is alive and the gold is back in place for the new try
+        for wumpus in self.current_state.wumpus_locations:
+            self._mark_square(wumpus.x, wumpus.y, CELL_DEADLY)
+        for gold in self.current_state.gold_locations:
+            self._mark_square(gold.x, gold.y, CELL_GLITTER)
+
+        self._update_location_percepts()
+
+    def snapshot(self):
+        """ snapshot: return the parts of the world that change during a try as a WorldState, for restore or step """
+        state = self.current_state
+        return WorldState(self.num_actions, state.agent_location.x, state.agent_location.y, state.agent_orientation,
+                state.agent_alive, state.agent_has_arrow, state.agent_has_gold, state.agent_in_cave,
+                state.wumpus_alive, self.current_percept.to_bits(), state.killed_wumpus, state.golds_grabbed)
+
+    def restore(self, snapshot):
+        """ restore: put the world back into the state it was in when the snapshot was taken """
+        state = self.current_state
+        (self.num_actions, x, y, state.agent_orientation, state.agent_alive, state.agent_has_arrow,
+         state.agent_has_gold, state.agent_in_cave, state.wumpus_alive, bits, state.killed_wumpus,
+         state.golds_grabbed) = snapshot
+        state.agent_location = Location(x, y)
+
+        percept = self.current_percept
+        percept.stench = (bits & PERCEPT_BIT_STENCH) != 0
+        percept.breeze = (bits & PERCEPT_BIT_BREEZE) != 0
+        percept.glitter = (bits & PERCEPT_BIT_GLITTER) != 0
+        percept.bump = (bits & PERCEPT_BIT_BUMP) != 0
+        percept.scream = (bits & PERCEPT_BIT_SCREAM) != 0
+
+        # The grid only changes when the gold is grabbed or the wumpus is killed, so put those squares back
+        for number, gold in enumerate(state.gold_locations):
+            if 1 <= gold.x <= self.world_size and 1 <= gold.y <= self.world_size:
+                if (state.golds_grabbed >> number) & 1:
+                    self.percept_grid[gold.x][gold.y] &= ~CELL_GLITTER
+                else:
+                    self.percept_grid[gold.x][gold.y] |= CELL_GLITTER
+        for number, wumpus in enumerate(state.wumpus_locations):
+            if 1 <= wumpus.x <= self.world_size and 1 <= wumpus.y <= self.world_size:
+                if number != state.killed_wumpus or self.percept_grid[wumpus.x][wumpus.y] & CELL_PIT:
+                    self.percept_grid[wumpus.x][wumpus.y] |= CELL_DEADLY
+                else:
+                    self.percept_grid[wumpus.x][wumpus.y] &= ~CELL_DEADLY
+
+    def initial_state(self):
+        """ initial_state: return the WorldState at the start of a try, without changing the world """
+        cell = self.percept_grid[1][1]
+        return WorldState(0, 1, 1, RIGHT, True, True, False, True, True,
+                          (PERCEPT_BIT_STENCH if cell & CELL_STENCH else 0) |
+                          (PERCEPT_BIT_BREEZE if cell & CELL_BREEZE else 0) |
+                          (PERCEPT_BIT_GLITTER if (1, 1) in self.gold_index else 0), None, 0)
+
+    def step(self, state, action):
+        """ step: return the (WorldState, percept bits, reward) after the action is taken in the state
+
+            The world itself is not changed, so a search can step many states of the same world. Only the flags
+            that never change during a try (pits, stench and breeze) are read from the world's percept grid. """
+        (num_actions, x, y, orientation, agent_alive, agent_has_arrow, agent_has_gold, agent_in_cave,
+         wumpus_alive, percept, killed_wumpus, golds_grabbed) = state
+        percept &= PERCEPT_BIT_STENCH | PERCEPT_BIT_BREEZE | PERCEPT_BIT_GLITTER
+        reward = -1
 
-        for pit in self.current_state.pit_locations:
-            if Location.adjacent(self.current_state.agent_location, pit):
-                self.current_percept.breeze = True
+        if action == GOFORWARD:
+            move_x, move_y = FORWARD_MOVES[orientation]
+            if 1 <= x + move_x <= self.world_size and 1 <= y + move_y <= self.world_size:
+                x += move_x
+                y += move_y
+                bump = 0
+            else:
+                bump = PERCEPT_BIT_BUMP
+
+            cell = self.percept_grid[x][y]
+            gold = self.gold_index.get((x, y))
+            wumpus = self.wumpus_index.get((x, y))
+            glitter = gold is not None and not (golds_grabbed >> gold) & 1
+            percept = ((PERCEPT_BIT_STENCH if cell & CELL_STENCH else 0) |
+                       (PERCEPT_BIT_BREEZE if cell & CELL_BREEZE else 0) |
+                       (PERCEPT_BIT_GLITTER if glitter else 0) | bump)
+
+            if cell & CELL_PIT or (wumpus is not None and wumpus != killed_wumpus):
+                agent_alive = False
+                reward -= 1000
+
+        elif action == TURNLEFT:
+            orientation = LEFT_TURNS[orientation]
+
+        elif action == TURNRIGHT:
+            orientation = RIGHT_TURNS[orientation]
+
+        elif action == GRAB:
+            gold = self.gold_index.get((x, y))
+            if gold is not None and not (golds_grabbed >> gold) & 1:
+                golds_grabbed |= 1 << gold
+                agent_has_gold = True
+                percept &= ~PERCEPT_BIT_GLITTER
+
+        elif action == SHOOT:
+            if agent_has_arrow:
+                agent_has_arrow = False
+                reward -= 9
+
+                wumpus = self._wumpus_in_line(x, y, orientation)
+                if wumpus_alive and wumpus is not None:
+                    wumpus_alive = False
+                    killed_wumpus = wumpus
+                    percept |= PERCEPT_BIT_SCREAM
+
+        elif action == CLIMB:
+            if x == 1 and y == 1:
+                agent_in_cave = False
+                percept = 0
+                reward += 1000 * _count_golds(golds_grabbed)
+
+        new_state = WorldState(num_actions + 1, x, y, orientation, agent_alive, agent_has_arrow, agent_has_gold,
+                               agent_in_cave, wumpus_alive, percept, killed_wumpus, golds_grabbed)
+        return new_state, percept, reward
+
+    def _wumpus_in_line(self, x, y, orientation):
+        """ _wumpus_in_line: return the number of the nearest wumpus the arrow shot from (x, y) would hit, or None """
+        nearest = None
+        nearest_distance = None
+        for number, wumpus in enumerate(self.current_state.wumpus_locations):
+            if orientation == RIGHT and x < wumpus.x and y == wumpus.y:
+                distance = wumpus.x - x
+            elif orientation == UP and x == wumpus.x and y < wumpus.y:
+                distance = wumpus.y - y
+            elif orientation == LEFT and x > wumpus.x and y == wumpus.y:
+                distance = x - wumpus.x
+            elif orientation == DOWN and x == wumpus.x and y > wumpus.y:
+                distance = y - wumpus.y
+            else:
+                continue
+            if nearest is None or distance < nearest_distance:
+                nearest = number
+                nearest_distance = distance
+        return nearest
 
-        if self.current_state.gold_location.x == 1 and self.current_state.gold_location.y == 1:
-            self.current_percept.glitter = True
+    @staticmethod
+    def state_score(state):
+        """ state_score: return the score of a WorldState, by the same rules as get_score """
+        score = -state.num_actions
+        if not state.agent_has_arrow:
+            score -= 9
+        if not state.agent_in_cave:
+            score += 1000 * _count_golds(state.golds_grabbed)
+        if not state.agent_alive:
+            score -= 1000
+        return score
+
+    @staticmethod
+    def state_game_over(state):
+        """ state_game_over: return True if the game is over in the WorldState """
+        return not state.agent_in_cave or not state.agent_alive
 
     def get_percept(self):
         """ get_percept: return the current percept for the agent's location """
@@ -201,12 +522,12 @@ class WumpusWorld(object):
 
         if action == GOFORWARD:
             if self.current_state.agent_orientation == RIGHT:
-                if self.current_state.agent_location.x < WORLD_SIZE:
+                if self.current_state.agent_location.x < self.world_size:
                     self.current_state.agent_location.x += 1
                 else:
                     self.current_percept.bump = True
             elif self.current_state.agent_orientation == UP:
-                if self.current_state.agent_location.y < WORLD_SIZE:
+                if self.current_state.agent_location.y < self.world_size:
                     self.current_state.agent_location.y += 1
                 else:
                     self.current_percept.bump = True
@@ -221,32 +542,10 @@ class WumpusWorld(object):
                 else:
                     self.current_percept.bump = True
 
-            # Update glitter percept
-            self.current_percept.glitter = False
-
-            if (not self.current_state.agent_has_gold) and \
-                    (self.current_state.agent_location == self.current_state.gold_location):
-                self.current_percept.glitter = True
-
-            # Update stench percept
-            self.current_percept.stench = False
-
-            if Location.adjacent(self.current_state.agent_location, self.current_state.wumpus_location) or \
-                    (self.current_state.agent_location == self.current_state.wumpus_location):
-                self.current_percept.stench = True
-
-            # Update breeze percept
-            self.current_percept.breeze = False
-
-            for pit in self.current_state.pit_locations:
-                if Location.adjacent(self.current_state.agent_location, pit):
-                    self.current_percept.breeze = True
-                elif self.current_state.agent_location == pit:
-                    self.current_state.agent_alive = False
+            # Update the glitter, stench and breeze percepts, and check for death by a pit or the wumpus
+            cell = self._update_location_percepts()
 
-            # check for death by wumpus
-            if self.current_state.wumpus_alive and \
-                    (self.current_state.agent_location == self.current_state.wumpus_location):
+            if cell & CELL_DEADLY:
                 self.current_state.agent_alive = False
 
         if action == TURNLEFT:
@@ -270,31 +569,33 @@ class WumpusWorld(object):
                 self.current_state.agent_orientation = LEFT
 
         if action == GRAB:
-            if not self.current_state.agent_has_gold and \
-                    (self.current_state.agent_location == self.current_state.gold_location):
+            location = self.current_state.agent_location
+            if self.percept_grid[location.x][location.y] & CELL_GLITTER:
                 self.current_state.agent_has_gold = True
+                self.current_state.golds_grabbed |= 1 << self.gold_index[(location.x, location.y)]
                 self.current_percept.glitter = False
+                self.percept_grid[location.x][location.y] &= ~CELL_GLITTER
 
         if action == SHOOT:
             if self.current_state.agent_has_arrow:
                 self.current_state.agent_has_arrow = False
 
                 if self.current_state.wumpus_alive:
-                    if (((self.current_state.agent_orientation == RIGHT) and
-                         (self.current_state.agent_location.x < self.current_state.wumpus_location.x) and
-                         (self.current_state.agent_location.y == self.current_state.wumpus_location.y)) or
-                        ((self.current_state.agent_orientation == UP) and
-                         (self.current_state.agent_location.x == self.current_state.wumpus_location.x) and
-                         (self.current_state.agent_location.y < self.current_state.wumpus_location.y)) or
-                        ((self.current_state.agent_orientation == LEFT) and
-                         (self.current_state.agent_location.x > self.current_state.wumpus_location.x) and
-                         (self.current_state.agent_location.y == self.current_state.wumpus_location.y)) or
-                        ((self.current_state.agent_orientation == DOWN) and
-                         (self.current_state.agent_location.x == self.current_state.wumpus_location.x) and
-                         (self.current_state.agent_location.y > self.current_state.wumpus_location.y))):
+                    wumpus = self._wumpus_in_line(self.current_state.agent_location.x,
+                                                  self.current_state.agent_location.y,
+                                                  self.current_state.agent_orientation)
+                    if wumpus is not None:
                         self.current_state.wumpus_alive = False
+                        self.current_state.killed_wumpus = wumpus
                         self.current_percept.scream = True
 
+                        # The dead wumpus still smells, but is only deadly if it shares its square with a pit
+                        wumpus_x = self.current_state.wumpus_locations[wumpus].x
+                        wumpus_y = self.current_state.wumpus_locations[wumpus].y
+                        if 1 <= wumpus_x <= self.world_size and 1 <= wumpus_y <= self.world_size and \
+                                not self.percept_grid[wumpus_x][wumpus_y] & CELL_PIT:
+                            self.percept_grid[wumpus_x][wumpus_y] &= ~CELL_DEADLY
+
         if action == CLIMB:
             if self.current_state.agent_location.x == 1 and self.current_state.agent_location.y == 1:
                 self.current_state.agent_in_cave = False
@@ -319,8 +620,8 @@ class WumpusWorld(object):
             score -= 9
 
         if self.current_state.agent_has_gold and not self.current_state.agent_in_cave:
-            # +1000 for leaving the cave with the gold
-            score += 1000
+            # +1000 for leaving the cave with each gold
+            score += 1000 * _count_golds(self.current_state.golds_grabbed)
 
         if not self.current_state.agent_alive:
             # -1000 for dying
@@ -328,96 +629,168 @@ class WumpusWorld(object):
 
         return score
 
-    def print_world(self):
-        """ print_world: print the current wumpus world"""
-
-        print("World size = {}x{}".format(WORLD_SIZE, WORLD_SIZE))
-
-        # print out the first horizontal line
-        out = "+"
-        for x in range(1, WORLD_SIZE + 1):
-            out += "---+"
-        print(out)
-
-        for y in range(WORLD_SIZE, 0, -1):  # print starting from the 'bottom' up
+    def print_world(self, stream=None, redraw=False):
+        """ print_world: print the current wumpus world to the stream (default is stdout)
 
-            # print out the first row, containing pits + gold + wumpus
-            out = "|"
+            With redraw, the stream is a terminal and only the lines that changed since the last print are redrawn,
+            in place. The text of the world is built once, then only the squares that change are updated. """
+        if stream is None:
+            stream = sys.stdout
+        if self.renderer is None:
+            self.renderer = WorldRenderer(self)
 
-            for x in range(1, WORLD_SIZE + 1):
-                if self.current_state.wumpus_location == Location(x, y):
-                    if self.current_state.wumpus_alive:
-                        out += "W"
-                    else:
-                        out += "x"
-                else:
-                    out += " "
-
-                if not self.current_state.agent_has_gold and self.current_state.gold_location == Location(x, y):
-                    out += "G"
-                else:
-                    out += " "
-
-                _has_pit = False
-                for pit in self.current_state.pit_locations:
-                    if pit == Location(x, y):
-                        _has_pit = True
-                if _has_pit:
-                    out += "P"
-                else:
-                    out += " "
-
-                out += "|"
-
-            print(out)
-
-            # print out the second row, containing the agent
-            out = "|"
+        if redraw:
+            self.renderer.redraw(stream)
+        else:
+            stream.write(self.renderer.render())
+
+
+class WorldRenderer(object):
+    """ WorldRenderer: the text of a wumpus world for print_world, keeping the text of every square and row, and
+                       only updating the squares whose wumpus, gold or agent changed since the last render """
+
+    def __init__(self, wumpus_world):
+        self.world = wumpus_world
+        size = wumpus_world.world_size
+
+        # The three characters of the top half (wumpus, gold and pit) and the bottom half (agent) of each square
+        self.tops = [[None] * (size + 1) for _ in range(size + 1)]
+        self.bottoms = [["   "] * (size + 1) for _ in range(size + 1)]
+        for x in range(1, size + 1):
+            for y in range(1, size + 1):
+                self.tops[x][y] = "  P" if wumpus_world.percept_grid[x][y] & CELL_PIT else "   "
+
+        # The lines of the world, with the two lines of row y at 2 + 3 * (size - y) and the one after it
+        border = "+" + "---+" * size
+        self.lines = ["World size = {}x{}".format(size, size), border]
+        for y in range(size, 0, -1):
+            self.lines.extend([None, None, border])
+        self.lines.extend([None, None, None, ""])
+        self.dirty_rows = set(range(1, size + 1))
+
+        # Every wumpus is shown alive and every gold in place, then only the ones that change are updated
+        state = wumpus_world.current_state
+        for wumpus in state.wumpus_locations:
+            self._set_top(wumpus, 0, "W")
+        for gold in state.gold_locations:
+            self._set_top(gold, 1, "G")
+
+        # What is shown of the wumpuses, the golds and the agent, to find the squares that change
+        self.shown_killed_wumpus = None
+        self.shown_golds_grabbed = 0
+        self.shown_agent = None
+
+        # The lines on the terminal, for redraw
+        self.terminal_lines = None
+
+    def _set_top(self, location, position, character):
+        """ _set_top: set a character of the top half of the location's square, if it is in the world """
+        size = self.world.world_size
+        if 1 <= location.x <= size and 1 <= location.y <= size:
+            top = self.tops[location.x][location.y]
+            self.tops[location.x][location.y] = top[:position] + character + top[position + 1:]
+            self.dirty_rows.add(location.y)
+
+    def _update(self):
+        """ _update: update the squares that changed, then the lines of their rows and the status lines """
+        state = self.world.current_state
+        size = self.world.world_size
+
+        if state.killed_wumpus != self.shown_killed_wumpus:
+            if self.shown_killed_wumpus is not None:
+                self._set_top(state.wumpus_locations[self.shown_killed_wumpus], 0, "W")
+            if state.killed_wumpus is not None:
+                self._set_top(state.wumpus_locations[state.killed_wumpus], 0, "x")
+            self.shown_killed_wumpus = state.killed_wumpus
+
+        changed_golds = state.golds_grabbed ^ self.shown_golds_grabbed
+        while changed_golds:
+            number = (changed_golds & -changed_golds).bit_length() - 1
+            changed_golds &= changed_golds - 1
+            self._set_top(state.gold_locations[number], 1, " " if (state.golds_grabbed >> number) & 1 else "G")
+        self.shown_golds_grabbed = state.golds_grabbed
+
+        agent = None
+        if state.agent_alive:
+            agent = (state.agent_location.x, state.agent_location.y, state.agent_orientation)
+        if agent != self.shown_agent:
+            if self.shown_agent is not None:
+                x, y, _ = self.shown_agent
+                self.bottoms[x][y] = "   "
+                self.dirty_rows.add(y)
+            if agent is not None:
+                x, y, orientation = agent
+                self.bottoms[x][y] = (" A>", " A^", " A<", " Av")[orientation]
+                self.dirty_rows.add(y)
+            self.shown_agent = agent
+
+        for y in self.dirty_rows:
+            line = 2 + 3 * (size - y)
+            self.lines[line] = "|" + "|".join(self.tops[x][y] for x in range(1, size + 1)) + "|"
+            self.lines[line + 1] = "|" + "|".join(self.bottoms[x][y] for x in range(1, size + 1)) + "|"
+        self.dirty_rows.clear()
+
+        percept = self.world.current_percept
+        self.lines[-4] = "Current percept = [stench={},breeze={},glitter={},bump={},scream={}]".format(
+            percept.stench, percept.breeze, percept.glitter, percept.bump, percept.scream)
+        self.lines[-3] = "Agent has gold = {}, agent has arrow = {}".format(state.agent_has_gold,
+                                                                           state.agent_has_arrow)
+        self.lines[-2] = "Current score = {}".format(self.world.get_score())
+
+    def render(self):
+        """ render: return the text of the whole world """
+        self._update()
+        return "\n".join(self.lines) + "\n"
+
+    def redraw(self, stream):
+        """ redraw: write only the lines that changed since the last redraw to the terminal, with ANSI escapes """
+        self._update()
+
+        if self.terminal_lines is None:
+            parts = [ANSI_CLEAR_SCREEN, "\n".join(self.lines), "\n"]
+        else:
+            parts = []
+            for number, (line, shown) in enumerate(zip(self.lines, self.terminal_lines), 1):
+                if line != shown:
+                    parts.append(ANSI_MOVE_TO_LINE.format(number) + line + ANSI_CLEAR_LINE)
+            parts.append(ANSI_MOVE_TO_LINE.format(len(self.lines) + 1) + ANSI_CLEAR_BELOW)
 
-            for x in range(1, WORLD_SIZE + 1):
-                if self.current_state.agent_alive and self.current_state.agent_location == Location(x, y):
-                    if self.current_state.agent_orientation == RIGHT:
-                        out += " A>|"
-                    elif self.current_state.agent_orientation == UP:
-                        out += " A^|"
-                    elif self.current_state.agent_orientation == LEFT:
-                        out += " A<|"
-                    else:
-                        out += " Av|"
-                else:
-                    out += "   |"
+        self.terminal_lines = list(self.lines)
+        stream.write("".join(parts))
+        stream.flush()
 
-            print(out)
-            out = "+"
 
-            # print out the final horizontal line
-            for x in range(1, WORLD_SIZE + 1):
-                out += "---+"
+class WorldLayout(object):
+    """ WorldLayout: the fixed layout of a world, which can be given to a WumpusWorld as its file_information """
 
-            print(out)
+    __slots__ = ("world_size", "wumpus_location", "gold_location", "pit_locations", "wumpus_locations",
+                 "gold_locations")
 
-        # print the current percepts for the agent's location
-        print("Current percept = [stench={},breeze={},glitter={},bump={},scream={}]".format(
-            self.current_percept.stench,
-            self.current_percept.breeze,
-            self.current_percept.glitter,
-            self.current_percept.bump,
-            self.current_percept.scream))
+    def __init__(self, world_size, wumpus_location, gold_location, pit_locations, wumpus_locations=None,
+                 gold_locations=None):
+        """ __init__: create a layout, whose wumpus_locations and gold_locations (when there is more than one of
+                      either) start with the wumpus_location and the gold_location """
+        self.world_size = world_size
+        self.wumpus_location = wumpus_location
+        self.gold_location = gold_location
+        self.pit_locations = pit_locations
+        self.wumpus_locations = wumpus_locations if wumpus_locations is not None else [wumpus_location]
+        self.gold_locations = gold_locations if gold_locations is not None else [gold_location]
 
-        print("Agent has gold = {}, agent has arrow = {}".format(
-            self.current_state.agent_has_gold,
-            self.current_state.agent_has_arrow))
 
-        print("Current score = {}".format(self.get_score()))
-        print()
+class WumpusWorldFileInformation(object):
+    """ WumpusWorldFileInformation: the layout read from a world file
 
+        After the size, wumpus and gold lines, the file may have any number of pit lines, and more wumpus and gold
+        lines for a world with several of them. """
 
-class WumpusWorldFileInformation(object):
     def __init__(self, filename):
         self.world_size = WORLD_SIZE
         self.wumpus_location = None
         self.gold_location = None
         self.pit_locations = []
+        self.wumpus_locations = []
+        self.gold_locations = []
 
         with open(filename, "r") as infile:
             lines = infile.readlines()
@@ -430,12 +803,10 @@ class WumpusWorldFileInformation(object):
             self._process_wumpus(lines[1])
             self._process_gold(lines[2])
 
-            if len(lines) > 3:  # only process the pits (optional) if there are more lines
+            if len(lines) > 3:  # only process the pits and other locations (optional) if there are more lines
                 self._process_pits(lines[3:])
 
     def _process_size(self, line):
-        global WORLD_SIZE  # if the size of the map is different than 4, then the world size will need updating.
-
         size_tokens = line.strip().split(" ")
         if len(size_tokens) != 2 or size_tokens[0] != "size":
             print("Incorrect token in world file '{}', expected 'size'".format(size_tokens[0]))
@@ -446,8 +817,6 @@ class WumpusWorldFileInformation(object):
             print("Invalid world size, size < 2.")
             sys.exit(1)
 
-        WORLD_SIZE = self.world_size  # update the global world size
-
     def _process_wumpus(self, line):
         tokens = line.strip().split(" ")
         if len(tokens) != 3 or tokens[0] != "wumpus":
@@ -461,8 +830,14 @@ class WumpusWorldFileInformation(object):
             print("Bad wumpus location in world file for location ({}, {}).".format(loc_x, loc_y))
             sys.exit(1)
 
-        # Create a new location object and set it to the wumpus location
-        self.wumpus_location = Location(loc_x, loc_y)
+        location = Location(loc_x, loc_y)
+        if location in self.wumpus_locations:
+            print("Duplicate wumpus location in world file for location ({}, {}).".format(loc_x, loc_y))
+            sys.exit(1)
+
+        # Create a new location object and add it to the wumpus locations, the first is the wumpus location
+        self.wumpus_locations.append(location)
+        self.wumpus_location = self.wumpus_locations[0]
 
     def _process_gold(self, line):
         tokens = line.strip().split(" ")
@@ -477,12 +852,24 @@ class WumpusWorldFileInformation(object):
             print("Bad gold location in world file for location ({}, {}).".format(loc_x, loc_y))
             sys.exit(1)
 
-        # Create a new location object and set it to the gold location
-        self.gold_location = Location(loc_x, loc_y)
+        location = Location(loc_x, loc_y)
+        if location in self.gold_locations:
+            print("Duplicate gold location in world file for location ({}, {}).".format(loc_x, loc_y))
+            sys.exit(1)
+
+        # Create a new location object and add it to the gold locations, the first is the gold location
+        self.gold_locations.append(location)
+        self.gold_location = self.gold_locations[0]
 
     def _process_pits(self, lines):
         for line in lines:
             tokens = line.strip().split(" ")
+            if tokens[0] == "wumpus":
+                self._process_wumpus(line)
+                continue
+            if tokens[0] == "gold":
+                self._process_gold(line)
+                continue
             if len(tokens) != 3 or tokens[0] != "pit":
                 print("Incorrect token in world file '{}', expected 'pit'".format(tokens[0]))
                 sys.exit(1)
@@ -498,31 +885,105 @@ class WumpusWorldFileInformation(object):
             self.pit_locations.append(Location(loc_x, loc_y))
 
 
+class Output(object):
+    """ Output: controls which simulator output is written, and where it is written """
+
+    def __init__(self, level=OUTPUT_SUMMARY, trace_file=None, redraw=False):
+        """ __init__: create a new output at the given level, optionally tracing every step to a file
+
+            With redraw, each step redraws the world in place on the terminal instead of printing it again. """
+        self.level = level
+        self.trace_file = trace_file
+        self.redraw = redraw
+
+        # Summaries go to stdout unless quiet, every step goes to stdout only when verbose,
+        # and the trace file (if any) receives everything
+        self.summary_streams = []
+        self.step_streams = []
+
+        if level >= OUTPUT_SUMMARY:
+            self.summary_streams.append(sys.stdout)
+        if level >= OUTPUT_VERBOSE:
+            self.step_streams.append(sys.stdout)
+        if trace_file is not None:
+            self.summary_streams.append(trace_file)
+            self.step_streams.append(trace_file)
+
+        # Check these flags before formatting any output, so nothing is formatted when it won't be written
+        self.summary_enabled = len(self.summary_streams) > 0
+        self.step_enabled = len(self.step_streams) > 0
+
+    def write(self, text):
+        """ write: write the step text to each of the step streams, allows for use as print(file=output) """
+        for stream in self.step_streams:
+            stream.write(text)
+
+    def flush(self):
+        """ flush: flush each of the step streams """
+        for stream in self.step_streams:
+            stream.flush()
+
+    def summary(self, text):
+        """ summary: write a line of summary text to each of the summary streams """
+        for stream in self.summary_streams:
+            stream.write(text + "\n")
+
+    def close(self):
+        """ close: close the trace file, if there is one """
+        if self.trace_file is not None:
+            self.trace_file.close()
+            self.trace_file = None
+
+
 class Agent(object):
-    @staticmethod
-    def construct():
+    """ Agent: calls the five functions of an agent module (PyAgent by default)
+
+        Any object with these methods can be used as the agent of a trial, such as a RemoteAgent. """
+
+    def __init__(self, module=None):
+        if module is None:
+            module = load_agent_module(DEFAULT_AGENT)
+        self.module = module
+
+    def set_output(self, output):
+        """ set_output: let the agent know if it should write its own per-step output """
+        self.module.VERBOSE = output.level >= OUTPUT_VERBOSE
+
+    def construct(self):
         """ construct: call the agent's constructor method """
-        PyAgent.PyAgent_Constructor()
+        self.module.PyAgent_Constructor()
 
-    @staticmethod
-    def initialize():
+    def initialize(self):
         """ initialize: call the agent's initialize method """
-        PyAgent.PyAgent_Initialize()
+        self.module.PyAgent_Initialize()
 
-    @staticmethod
-    def process(percept):
+    def process(self, percept):
         """ process: call the agent's process method, passing to it the percepts """
-        return PyAgent.PyAgent_Process(percept.stench, percept.breeze, percept.glitter, percept.bump, percept.scream)
+        return self.module.PyAgent_Process(percept.stench, percept.breeze, percept.glitter, percept.bump,
+                                           percept.scream)
 
-    @staticmethod
-    def game_over(score):
+    def game_over(self, score):
         """ game_over: call the agent's game over method, passing to it the final score """
-        PyAgent.PyAgent_GameOver(score)
+        self.module.PyAgent_GameOver(score)
 
-    @staticmethod
-    def destructor():
+    def destructor(self):
         """ deconstructor: call the agent's destructor """
-        PyAgent.PyAgent_Destructor()
+        self.module.PyAgent_Destructor()
+
+    def get_state(self):
+        """ get_state: return the agent's optional PyAgent_GetState(), the state it asks to have checkpointed """
+        get_state = getattr(self.module, "PyAgent_GetState", None)
+        return get_state() if get_state is not None else None
+
+    def set_state(self, state):
+        """ set_state: give a checkpointed state back to the agent's optional PyAgent_SetState """
+        set_state = getattr(self.module, "PyAgent_SetState", None)
+        if set_state is not None:
+            set_state(state)
+
+    def close(self):
+        """ close: release anything held by the agent once the simulation is over """
+        pass
 
 
 def action_to_string(action):
@@ -542,74 +1003,440 @@ def action_to_string(action):
     return "UNKNOWN ACTION"
 
 
-def main(args):
-    """ main: the main driver for the wumpus simulator
-              iterates over each trial, creating a new wumpus world
-              then allows for the given number of tries for that world """
+def get_output(args):
+    """ get_output: create the simulator output for the output level and trace file given in the arguments """
+    level = OUTPUT_SUMMARY
+    if args.quiet:
+        level = OUTPUT_QUIET
+    elif args.verbose or args.watch:
+        level = OUTPUT_VERBOSE
 
-    print("Welcome to the Python Wumpus World Simulator {} by Erik Phillips. Happy Hunting!\n".format(WUMPSIM_VERSION))
+    trace_file = None
+    if args.trace is not None:
+        trace_file = open(args.trace, "w")
 
-    total_score = 0
+    return Output(level=level, trace_file=trace_file, redraw=args.watch)
 
-    # Set random number generator seed
-    # If no seed is given, args.seed is None, therefore the seed will be random
-    random.seed(args.seed)
 
-    for trials in range(1, args.trials + 1):
-        file_information = None
-        if args.world is not None:
-            file_information = WumpusWorldFileInformation(args.world)
+def read_world_file(filename):
+    """ read_world_file: parse the world file, returning its layout """
+    file_information = WumpusWorldFileInformation(filename)
+    return WorldLayout(file_information.world_size, file_information.wumpus_location,
+                       file_information.gold_location, file_information.pit_locations,
+                       file_information.wumpus_locations, file_information.gold_locations)
+
+
+def list_world_files(path):
+    """ list_world_files: return the sorted world files (by WORLD_FILE_EXTENSION) in the directory, or the path
+                          itself if it is a file """
+    if not os.path.isdir(path):
+        return [path]
+
+    return [os.path.join(path, name) for name in sorted(os.listdir(path))
+            if name.endswith(WORLD_FILE_EXTENSION) and os.path.isfile(os.path.join(path, name))]
+
+
+def load_worlds(path):
+    """ load_worlds: load the world file, directory of world files, or world pack once, returning the layouts
+
+        The layouts are never changed by a wumpus world, so each trial can share them with a fresh state. """
+    if os.path.isfile(path):
+        with open(path, "rb") as infile:
+            magic = infile.read(4)
+
+        import WorldPack
+        if magic == WorldPack.WORLD_PACK_MAGIC:
+            world_pack = WorldPack.WorldPack(path)  # decoded one world at a time, as trials need them
+            if len(world_pack) == 0:
+                print("No worlds found in world pack '{}'.".format(path))
+                sys.exit(1)
+            return world_pack
+
+    worlds = [read_world_file(filename) for filename in list_world_files(path)]
+    if len(worlds) == 0:
+        print("No world files found in '{}'.".format(path))
+        sys.exit(1)
+
+    return worlds
+
+
+def load_agent_module(name, fresh=False):
+    """ load_agent_module: import the agent module by name, or load a fresh copy of it with its own module state,
+                           raising ImportError if there is no such module """
+    import importlib
+    import importlib.util
+
+    try:
+        spec = importlib.util.find_spec(name)
+    except ImportError:
+        spec = None  # a package in the dotted name is missing
+    if spec is None:
+        raise ImportError("Agent module '{}' not found".format(name))
+
+    if not fresh:
+        return importlib.import_module(name)
+
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_agent(spec, fresh=False):
+    """ load_agent: return the agent for 'module' (with the five PyAgent_ functions) or 'module:Class'
+
+        An agent class is created with no arguments, and must have the same methods as Agent. """
+    module_name, _, class_name = spec.partition(":")
+    if class_name:
+        return getattr(load_agent_module(module_name, fresh), class_name)()
+    return Agent(load_agent_module(module_name, fresh))
+
+
+def get_agent(args):
+    """ get_agent: return the agent for the arguments, either the -agent (PyAgent by default) or an agent server """
+    if args.remote is None:
+        try:
+            return load_agent(args.agent)
+        except ImportError as error:
+            print("{}.".format(error))
+            sys.exit(1)
+
+    import RemoteAgent
+    host, port = args.remote.rsplit(":", 1)
+    return RemoteAgent.RemoteAgent.connect(host, int(port))
+
+
+def get_trial_seed(seed, trial):
+    """ get_trial_seed: return the seed for a trial, derived only from the simulator seed and the trial number """
+    return random.Random("{}:{}".format(seed, trial)).getrandbits(32)
+
+
+def get_trial_world(worlds, trial):
+    """ get_trial_world: return the layout for the trial, cycling through the loaded worlds (None for random) """
+    if worlds is None:
+        return None
+    return worlds[(trial - 1) % len(worlds)]
+
+
+def get_world_set(seed, trials, world=None):
+    """ get_world_set: return the layout of every trial, the same worlds main plays for the seed """
+    if world is not None:
+        worlds = load_worlds(world)
+        return [WorldLayout(layout.world_size, layout.wumpus_location, layout.gold_location,
+                            list(layout.pit_locations), layout_wumpuses(layout), layout_golds(layout))
+                for layout in (get_trial_world(worlds, trial) for trial in range(1, trials + 1))]
+
+    layouts = []
+    for trial in range(1, trials + 1):
+        random.seed(get_trial_seed(seed, trial))
+        layouts.append(State(file_information=None).get_layout())
+    return layouts
+
+
+def get_world_options(args):
+    """ get_world_options: return the size and the numbers of wumpuses and golds of the random worlds for the
+                           arguments, as keyword arguments for WumpusWorld (arguments without them get the defaults) """
+    return {"world_size": getattr(args, "size", None), "num_wumpuses": getattr(args, "wumpuses", 1),
+            "num_golds": getattr(args, "golds", 1)}
+
+
+def run_trial(trial, trial_seed, file_information, agent, args, output, world_wrappers=()):
+    """ run_trial: run every try of a single trial on a new world, returning the list of scores for each try
+
+        The world is built from the file_information layout, or generated randomly if there is none. Each of the
+        world wrappers (such as instrumentation or an episode recorder) may wrap the world to watch its calls. """
+
+    # Seed the trial on its own, so the trial is the same no matter which process runs it
+    random.seed(trial_seed)
+
+    wumpus_world = WumpusWorld(file_information=file_information, **get_world_options(args))  # init a new world
+    for world_wrapper in world_wrappers:
+        wumpus_world = world_wrapper.wrap_world(wumpus_world, trial, trial_seed)
+    agent.construct()  # call the constructor on the imported agent
+
+    scores = []
+
+    for tries in range(1, args.tries + 1):
+        wumpus_world.initialize()  # call initialize on the wumpus world, resetting for the try
+        agent.initialize()  # call the initialize method for the imported agent
+
+        num_moves = 0
+
+        if output.step_enabled:
+            print("Trial {}, Try {} begin".format(trial, tries), file=output)
+            print(file=output)
+
+        while (not wumpus_world.game_over()) and (num_moves < MAX_MOVES_PER_GAME):
+            if output.step_enabled:
+                wumpus_world.print_world(output, redraw=output.redraw)
+
+            percept = wumpus_world.get_percept()  # get the percepts for the current location
+            action = agent.process(percept)  # and pass the percepts to the imported agent, expecting an action
 
-        wumpus_world = WumpusWorld(file_information=file_information)  # init a new wumpus world
-        Agent.construct()  # call the constructor on the imported agent
+            if output.step_enabled:
+                print("Action = {}".format(action_to_string(action)), file=output)
+                print(file=output)
 
-        trial_score = 0
+            wumpus_world.execute_action(action)  # execute the action in the wumpus world
+            num_moves += 1
 
-        for tries in range(1, args.tries + 1):
-            wumpus_world.initialize()  # call initialize on the wumpus world, resetting for the try
-            Agent.initialize()  # call the initialize method for the imported agent
+        score = wumpus_world.get_score()  # get the final score for the world
+        agent.game_over(score)  # and pass that score to the imported agent, signaling game over
+        scores.append(score)
 
-            num_moves = 0
+        if output.summary_enabled:
+            output.summary("Trial {}, Try {} complete: score = {}\n".format(trial, tries, score))
 
-            print("Trial {}, Try {} begin".format(trials, tries))
-            print()
+    agent.destructor()  # call the deconstructor on the imported agent for this trial is over
 
-            while (not wumpus_world.game_over()) and (num_moves < MAX_MOVES_PER_GAME):
-                wumpus_world.print_world()
-                percept = wumpus_world.get_percept()  # get the percepts for the current location
-                action = Agent.process(percept)  # and pass the percepts to the imported agent, expecting an action
+    return scores
 
-                print("Action = {}".format(action_to_string(action)))
-                print()
 
-                wumpus_world.execute_action(action)  # execute the action in the wumpus world
-                num_moves += 1
+# The arguments, loaded worlds and agent for the trials run by a worker process, set once when the worker starts
+_worker_args = None
+_worker_worlds = None
+_worker_agent = None
+_worker_solvable_worlds = None
 
-            score = wumpus_world.get_score()  # get the final score for the world
-            Agent.game_over(score)  # and pass that score to the imported agent, signaling game over
-            trial_score += score
 
-            print("Trial {}, Try {} complete: score = {}\n".format(trials, tries, score))
+def _init_worker(args):
+    """ _init_worker: set up a worker process to run trials without writing any output """
+    global _worker_args, _worker_worlds, _worker_agent, _worker_solvable_worlds
+    _worker_args = args
+    _worker_worlds = load_worlds(args.world) if args.world is not None else None
+    _worker_agent = get_agent(args)
+    _worker_agent.set_output(Output(level=OUTPUT_QUIET))
+    if args.compile:
+        import PolicyTable
+        _worker_agent = PolicyTable.CompiledAgent(_worker_agent)
+    if args.solvable:
+        import Solver
+        _worker_solvable_worlds = Solver.SolvableWorlds(world_size=args.size)
 
-        Agent.destructor()  # call the deconstructor on the imported agent for this trial is over
+
+def _run_worker_trial(job):
+    """ _run_worker_trial: run a single (trial, trial_seed) job in a worker process, returning the scores, the
+                           number of candidate worlds rejected for the trial, and the counts added to the policy
+                           table by the trial (None without -compile) """
+    trial, trial_seed = job
+    file_information = get_trial_world(_worker_worlds, trial)
+
+    num_rejected = 0
+    if _worker_solvable_worlds is not None:
+        num_rejected = _worker_solvable_worlds.num_rejected
+        file_information = _worker_solvable_worlds.generate(trial_seed)
+        num_rejected = _worker_solvable_worlds.num_rejected - num_rejected
+
+    table = _worker_agent.table if _worker_args.compile else None
+    counts = table.get_counts() if table is not None else None
+
+    scores = run_trial(trial, trial_seed, file_information, _worker_agent, _worker_args, Output(level=OUTPUT_QUIET))
+
+    if table is not None:
+        counts = tuple(after - before for after, before in zip(table.get_counts(), counts))
+    return scores, num_rejected, counts
+
+
+def run_trials(seed, agent, args, output, world_wrappers=(), solvable_worlds=None, first_trial=1, policy_table=None):
+    """ run_trials: generate the (trial, scores) of every trial from first_trial in order, using a pool of workers
+                    if requested
+
+        With solvable_worlds (a Solver.SolvableWorlds), each random world is drawn from the trial seed until the
+        gold can be brought out of it. The counts of the workers' policy tables (-compile) are added to
+        policy_table. Each worker plays its trials with its own copy of the agent, so the scores
+        match a single worker's only for an agent that keeps no state from one trial to the next. """
+    jobs = ((trial, get_trial_seed(seed, trial)) for trial in range(first_trial, args.trials + 1))
+
+    if args.workers is None or args.workers <= 1:
+        # Parse the worlds once, rather than once for every trial
+        worlds = load_worlds(args.world) if args.world is not None else None
+
+        for trial, trial_seed in jobs:
+            file_information = get_trial_world(worlds, trial)
+            if solvable_worlds is not None:
+                file_information = solvable_worlds.generate(trial_seed)
+            yield trial, run_trial(trial, trial_seed, file_information, agent, args, output, world_wrappers)
+        return
+
+    import multiprocessing
+
+    # Hand out the trials in chunks, so there is little overhead for short trials
+    chunk_size = max(1, min(1000, (args.trials - first_trial + 1) // (args.workers * 4)))
+
+    pool = multiprocessing.Pool(args.workers, initializer=_init_worker, initargs=(args,))
+    try:
+        for trial, (scores, num_rejected, counts) in zip(range(first_trial, args.trials + 1),
+                                                         pool.imap(_run_worker_trial, jobs, chunk_size)):
+            if solvable_worlds is not None:
+                solvable_worlds.num_worlds += 1
+                solvable_worlds.num_rejected += num_rejected
+            if policy_table is not None:
+                policy_table.add_counts(counts)
+
+            # The workers write nothing, so write the try scores here in the order of the trials
+            if output.summary_enabled:
+                for tries, score in enumerate(scores, 1):
+                    output.summary("Trial {}, Try {} complete: score = {}\n".format(trial, tries, score))
+            yield trial, scores
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def get_agent_state(agent):
+    """ get_agent_state: return the state the agent asks to have kept between runs, or None if it has none """
+    get_state = getattr(agent, "get_state", None)
+    return get_state() if get_state is not None else None
+
+
+def set_agent_state(agent, state):
+    """ set_agent_state: give the agent back the state from get_agent_state, if it takes one """
+    set_state = getattr(agent, "set_state", None)
+    if set_state is not None and state is not None:
+        set_state(state)
+
+
+def get_checkpoint(args, seed, trial, total_score, agent, solvable_worlds):
+    """ get_checkpoint: return the checkpoint of the run after the trial, for Checkpoint.Checkpointer """
+    return {"args": vars(args), "seed": seed, "trial": trial, "total_score": total_score,
+            "random_state": random.getstate(), "agent_state": get_agent_state(agent),
+            "solvable": ((solvable_worlds.num_worlds, solvable_worlds.num_rejected)
+                         if solvable_worlds is not None else None)}
+
+
+def main(args, stop_after=None):
+    """ main: the main driver for the wumpus simulator
+              iterates over each trial, creating a new wumpus world
+              then allows for the given number of tries for that world
+
+        stop_after, if given, is called with the (trial, scores) of each trial in order, and returns True to stop
+        without running the rest of the trials. The averages are then over the trials that were run. """
+
+    output = get_output(args)
+    agent = get_agent(args)
+    agent.set_output(output)
+
+    # Play repeated percept histories from a table of the agent's actions only when asked
+    policy_table = None
+    if args.compile:
+        import PolicyTable
+        agent = PolicyTable.CompiledAgent(agent)
+        policy_table = agent.table
+
+    # Time or record the agent and each world only when asked, so the simulator loop is unchanged otherwise
+    world_wrappers = []
+
+    instrumentation = None
+    if args.instrument is not None:
+        import Instrumentation
+        instrumentation = Instrumentation.Instrumentation()
+        agent = instrumentation.wrap_agent(agent)
+        world_wrappers.append(instrumentation)
+
+    recorder = None
+    if args.log is not None:
+        import EpisodeLog
+        recorder = EpisodeLog.EpisodeRecorder(args.log)
+        world_wrappers.append(recorder)
+
+    solvable_worlds = None
+    if args.solvable:
+        import Solver
+        solvable_worlds = Solver.SolvableWorlds(world_size=args.size)
+
+    profiler = None
+    if args.profile is not None:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    if output.summary_enabled:
+        output.summary("Welcome to the Python Wumpus World Simulator {} by Erik Phillips. "
+                       "Happy Hunting!\n".format(WUMPSIM_VERSION))
+
+    total_score = 0
+
+    # Each trial is seeded from the simulator seed, so the results are the same for any number of workers, as long
+    # as the agent keeps no state from one trial to the next (each worker has its own copy of the agent)
+    # If no seed is given, args.seed is None, therefore the seed will be random
+    seed = args.seed
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(32)
+
+    num_trials = 0
+
+    # Continue from the last checkpoint of the run, if there is one
+    checkpointer = None
+    if args.checkpoint is not None:
+        import Checkpoint
+        checkpointer = Checkpoint.Checkpointer(args.checkpoint, args.checkpoint_interval)
+        checkpoint = Checkpoint.read_checkpoint(args.checkpoint) if args.resume else None
+        if checkpoint is not None:
+            Checkpoint.check_resumable(checkpoint, args)
+            seed = checkpoint["seed"]
+            num_trials = checkpoint["trial"]
+            total_score = checkpoint["total_score"]
+            random.setstate(checkpoint["random_state"])
+            set_agent_state(agent, checkpoint["agent_state"])
+            if solvable_worlds is not None:
+                solvable_worlds.num_worlds, solvable_worlds.num_rejected = checkpoint["solvable"]
+            if output.summary_enabled:
+                output.summary("Resuming after trial {}\n".format(num_trials))
+
+    trial_results = run_trials(seed, agent, args, output, world_wrappers, solvable_worlds, num_trials + 1,
+                               policy_table)
+    for trials, scores in trial_results:
+        trial_score = sum(scores)
         average_score = trial_score / args.tries
         total_score += trial_score
+        num_trials = trials
+
+        if output.summary_enabled:
+            output.summary("Trial {} complete: Average score for trial = {}, "
+                           "total score for trial = {}\n".format(trials, average_score, trial_score))
+
+        if checkpointer is not None and checkpointer.due():
+            checkpointer.write(get_checkpoint(args, seed, num_trials, total_score, agent, solvable_worlds))
+
+        if stop_after is not None and stop_after(trials, scores):
+            break
+    trial_results.close()  # stops the workers, if the trials were stopped early
+
+    if checkpointer is not None:
+        checkpointer.write(get_checkpoint(args, seed, num_trials, total_score, agent, solvable_worlds))
+
+    average_score = total_score / (num_trials * args.tries)
 
-        print("Trial {} complete: Average score for trial = {}, total score for trial = {}\n".format(trials,
-                                                                                                     average_score,
-                                                                                                     trial_score))
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
 
-    average_score = total_score / (args.trials * args.tries)
-    print("All trials completed: Average score for all trials = {}, " \
-          "Total score for all trials = {}".format(average_score, total_score))
-    print("Thanks for playing!")
-    print()
+    if recorder is not None:
+        recorder.close()
+
+    if instrumentation is not None:
+        import json
+        instrumentation.finish()
+        with open(args.instrument, "w") as outfile:
+            json.dump(instrumentation.report(), outfile, indent=2)
+
+    if output.summary_enabled:
+        output.summary("All trials completed: Average score for all trials = {}, "
+                       "Total score for all trials = {}".format(average_score, total_score))
+        if solvable_worlds is not None:
+            output.summary(solvable_worlds.report())
+        if policy_table is not None:
+            output.summary(policy_table.report(args.workers or 1))
+        output.summary("Thanks for playing!\n")
+
+    agent.close()
+    output.close()
 
     # Return the average_score and the total_score
     return average_score, total_score
 
 
-if __name__ == '__main__':
+def get_parser():
+    """ get_parser: return the argument parser for the simulator's command line """
     import argparse
 
     parser = argparse.ArgumentParser()
@@ -617,7 +1444,35 @@ if __name__ == '__main__':
     parser.add_argument('-trials', type=int, default=1)
     parser.add_argument('-seed', type=int)
     parser.add_argument('-world', type=str)
-    args = parser.parse_args()
+    parser.add_argument('-size', type=int)
+    parser.add_argument('-wumpuses', type=int, default=1)
+    parser.add_argument('-golds', type=int, default=1)
+    parser.add_argument('-agent', type=str, default=DEFAULT_AGENT)
+
+    output_group = parser.add_mutually_exclusive_group()
+    output_group.add_argument('-quiet', action='store_true')
+    output_group.add_argument('-summary', action='store_true')
+    output_group.add_argument('-verbose', action='store_true')
+    output_group.add_argument('-watch', action='store_true')
+    parser.add_argument('-trace', type=str)
+    parser.add_argument('-workers', type=int)
+    parser.add_argument('-remote', type=str)
+    parser.add_argument('-instrument', type=str)
+    parser.add_argument('-profile', type=str)
+    parser.add_argument('-log', type=str)
+    parser.add_argument('-solvable', action='store_true')
+    parser.add_argument('-compile', action='store_true')
+    parser.add_argument('-checkpoint', type=str)
+    parser.add_argument('-checkpoint-interval', type=float, default=CHECKPOINT_INTERVAL)
+    parser.add_argument('-resume', action='store_true')
+    return parser
+
+
+def parse_args(argv=None):
+    """ parse_args: parse and check the simulator's arguments (the command line, unless argv is given) for main """
+    import argparse
+
+    args = get_parser().parse_args(argv)
 
     if args.tries <= 0:
         raise argparse.ArgumentTypeError("Minimum tries is 1")
@@ -628,4 +1483,68 @@ if __name__ == '__main__':
     if args.seed and args.seed <= 0:
         raise argparse.ArgumentTypeError("Seed must be a positive integer")
 
-    main(args)
+    if args.size is not None and args.size < 2:
+        raise argparse.ArgumentTypeError("Minimum size is 2")
+
+    if args.wumpuses <= 0 or args.golds <= 0:
+        raise argparse.ArgumentTypeError("Minimum wumpuses and golds is 1")
+
+    size = args.size if args.size is not None else WORLD_SIZE
+    if args.wumpuses > size * size - 1 or args.golds > size * size - 1:
+        raise argparse.ArgumentTypeError("At most {} wumpuses and golds fit in a {}x{} world".format(
+            size * size - 1, size, size))
+
+    if args.world is not None and (args.size is not None or args.wumpuses != 1 or args.golds != 1):
+        raise argparse.ArgumentTypeError("Only random worlds are sized (-size, -wumpuses, -golds), not a -world")
+
+    if args.solvable and (args.wumpuses != 1 or args.golds != 1):
+        raise argparse.ArgumentTypeError("Only worlds with one wumpus and one gold can be filtered (-solvable)")
+
+    if args.resume and args.checkpoint is None:
+        raise argparse.ArgumentTypeError("A run is resumed (-resume) from its -checkpoint")
+
+    if args.checkpoint_interval <= 0:
+        raise argparse.ArgumentTypeError("The checkpoint interval must be positive")
+
+    if args.resume and (args.trace is not None or args.log is not None):
+        raise argparse.ArgumentTypeError("A resumed run (-resume) can't continue a -trace or -log")
+
+    if args.workers is not None and args.workers <= 0:
+        raise argparse.ArgumentTypeError("Minimum workers is 1")
+
+    if args.workers is not None and args.workers > 1 and (args.verbose or args.watch or args.trace is not None):
+        raise argparse.ArgumentTypeError("Per-step output (-verbose, -watch, -trace) requires a single worker")
+
+    if args.watch and args.trace is not None:
+        raise argparse.ArgumentTypeError("The world is redrawn on the terminal (-watch), use -verbose with -trace")
+
+    if args.workers is not None and args.workers > 1 and args.remote is not None:
+        raise argparse.ArgumentTypeError("A remote agent (-remote) requires a single worker")
+
+    if args.remote is not None and args.agent != DEFAULT_AGENT:
+        raise argparse.ArgumentTypeError("The agent is chosen by its server (-remote), not by -agent")
+
+    if args.workers is not None and args.workers > 1 and (args.instrument is not None or args.profile is not None):
+        raise argparse.ArgumentTypeError("Instrumenting (-instrument, -profile) requires a single worker")
+
+    if args.workers is not None and args.workers > 1 and args.log is not None:
+        raise argparse.ArgumentTypeError("An episode log (-log) requires a single worker")
+
+    if args.solvable and args.world is not None:
+        raise argparse.ArgumentTypeError("Only random worlds can be filtered (-solvable), not a -world")
+
+    if args.log is not None:
+        import EpisodeLog
+        if EpisodeLog.is_binary_path(args.log):
+            single = args.wumpuses == 1 and args.golds == 1
+            if single and args.world is not None:
+                single = all(has_one_wumpus_and_gold(world) for world in load_worlds(args.world))
+            if not single:
+                raise argparse.ArgumentTypeError("A binary episode log (-log *.wlog) only holds worlds with one wumpus "
+                                                 "and one gold, use a JSON log")
+
+    return args
+
+
+if __name__ == '__main__':
+    main(parse_args())
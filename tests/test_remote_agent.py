@@ -0,0 +1,53 @@
+#
+# test_remote_agent.py checks that the agent server ends a session cleanly when its stream is cut off
+#
+# Usage: python -m pytest tests
+#
+
+
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import RemoteAgent
+
+
+class TestAgentServer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = RemoteAgent.AgentServer("PyAgent")
+
+    def serve(self, data):
+        """ serve: serve the data as a session, returning what the server wrote back """
+        outstream = io.BytesIO()
+        self.server.serve(io.BytesIO(data), outstream)
+        return outstream.getvalue()
+
+    def test_session(self):
+        """ test_session: a whole session is answered and ends at its quit message """
+        slots = RemoteAgent._COUNT.pack(1) + RemoteAgent._SLOT.pack(0)
+        percepts = RemoteAgent._COUNT.pack(1) + RemoteAgent._PERCEPT.pack(0, 0)
+        session = (RemoteAgent.OP_VERBOSE + RemoteAgent._FLAG.pack(0) + RemoteAgent.OP_CONSTRUCT + slots +
+                   RemoteAgent.OP_INITIALIZE + slots + RemoteAgent.OP_PROCESS + percepts + RemoteAgent.OP_QUIT)
+        self.assertEqual(len(self.serve(session)), 1)
+
+    def test_truncated_stream(self):
+        """ test_truncated_stream: a stream cut off anywhere in a message ends the session without an error """
+        slots = RemoteAgent._COUNT.pack(2) + RemoteAgent._SLOT.pack(0) + RemoteAgent._SLOT.pack(1)
+        messages = [RemoteAgent.OP_VERBOSE + RemoteAgent._FLAG.pack(0),
+                    RemoteAgent.OP_CONSTRUCT + slots,
+                    RemoteAgent.OP_INITIALIZE + slots,
+                    RemoteAgent.OP_PROCESS + RemoteAgent._COUNT.pack(2) + RemoteAgent._PERCEPT.pack(0, 0) +
+                    RemoteAgent._PERCEPT.pack(1, 0),
+                    RemoteAgent.OP_GAME_OVER + RemoteAgent._COUNT.pack(1) + RemoteAgent._SCORE.pack(0, -1001)]
+
+        for message in messages:
+            for length in range(1, len(message)):
+                self.serve(RemoteAgent.OP_VERBOSE + RemoteAgent._FLAG.pack(0) + message[:length])
+
+
+if __name__ == '__main__':
+    unittest.main()
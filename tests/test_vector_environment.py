@@ -0,0 +1,55 @@
+#
+# test_vector_environment.py checks that VectorEnvironment and BatchWumpusWorld step in place
+#
+# Usage: python -m pytest tests
+#
+
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+ENVIRONMENT_ARRAYS = ("observations", "rewards", "terminated", "truncated", "episode_scores")
+BATCH_ARRAYS = ("agent_x", "agent_y", "agent_orientation", "agent_alive", "agent_has_arrow", "agent_has_gold",
+                "agent_in_cave", "wumpus_alive", "num_actions", "percepts")
+
+
+@unittest.skipIf(np is None, "requires NumPy")
+class TestVectorEnvironment(unittest.TestCase):
+
+    def test_step_reuses_arrays(self):
+        """ test_step_reuses_arrays: every step writes into the same arrays, including steps that end episodes """
+        from VectorEnvironment import VectorEnvironment
+
+        env = VectorEnvironment(64, world_size=4, max_moves=20)
+        env.reset(seed=1)
+        batch = env.batch
+        arrays = [(env, name, getattr(env, name)) for name in ENVIRONMENT_ARRAYS]
+        arrays += [(batch, name, getattr(batch, name)) for name in BATCH_ARRAYS]
+
+        rng = np.random.default_rng(1)
+        num_done = 0
+        for _ in range(100):
+            observations, rewards, terminated, truncated = env.step(rng.integers(0, 6, env.num_envs))
+            self.assertIs(observations, env.observations)
+            self.assertIs(rewards, env.rewards)
+            self.assertIs(terminated, env.terminated)
+            self.assertIs(truncated, env.truncated)
+            for owner, name, array in arrays:
+                self.assertIs(getattr(owner, name), array, name)
+            num_done += int(np.count_nonzero(terminated | truncated))
+
+        self.assertIs(env.batch, batch)
+        self.assertGreater(num_done, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()